@@ -17,8 +17,9 @@ from TDLB.Create import CreateMethodsMixin
 from TDLB.Read import ReadMethodsMixin
 from TDLB.Update import UpdateMethodsMixin
 from TDLB.Delete import DeleteMethodsMixin
+from TDLB.Bulk import BulkMethodsMixin
   
-class Adaptor(CreateMethodsMixin, ReadMethodsMixin, UpdateMethodsMixin, DeleteMethodsMixin):
+class Adaptor(CreateMethodsMixin, ReadMethodsMixin, UpdateMethodsMixin, DeleteMethodsMixin, BulkMethodsMixin):
   # Default config
   _DBHost = 'localhost' ;
   _DBPort = 3306 ;
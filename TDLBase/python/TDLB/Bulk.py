@@ -0,0 +1,108 @@
+'''
+Set-based bulk load methods for TDLB.Adaptor
+
+These load a whole input file into a temporary staging table and then
+resolve, insert and update with a few joins, instead of several
+statements per input line.
+
+Steve Mathias
+smathias@salud.unm.edu
+'''
+from mysql.connector import Error
+from contextlib import closing
+
+class BulkMethodsMixin:
+
+  def upd_targets_hgnc(self, rows):
+    '''
+    Function  : Annotate targets with HGNC data in bulk
+    Arguments : A list of (line_no, hgnc_id, sym, chr, geneid, uniprot) tuples,
+                in file order. geneid and uniprot may be None.
+    Returns   : A dictionary of results (see below), or False on error
+    Scope     : Public
+    Comments  : This does the same as load-HGNC.py's row by row load:
+                each line is matched to targets by sym, or if there are none
+                by geneid, or if there are none by uniprot, and each target
+                is annotated from the first line that matches it. For each
+                annotated target, an 'HGNC ID' xref is inserted, chr is set,
+                and missing sym and geneid values are filled in.
+                The returned dictionary has keys:
+                  target_ct: number of targets annotated
+                  notfnd: list of (sym, geneid, uniprot) of lines with a
+                    uniprot that match no target
+                  hgnc_ct, chr_ct, sym_ct, geneid_ct: numbers of xrefs
+                    inserted and values updated
+                  new_syms, new_geneids: lists of (target_id, uniprot, value)
+                    of the values filled in
+                  symdiscrs, geneiddiscrs: lists of (target's value, HGNC's
+                    value) of discrepant values
+    '''
+    rv = {}
+    with closing(self._conn.cursor()) as curs:
+      try:
+        self._create_hgnc_stage(curs)
+        curs.executemany("INSERT INTO hgnc_stage (line_no, hgnc_id, sym, chr, geneid, uniprot) VALUES (%s, %s, %s, %s, %s, %s)", rows)
+        # Resolve lines to targets, in order of precedence. A line is only
+        # matched by geneid (uniprot) if it did not match by sym (or geneid).
+        curs.execute("CREATE TEMPORARY TABLE hgnc_match (line_no INT NOT NULL, target_id INT NOT NULL)")
+        for col in ['sym', 'geneid', 'uniprot']:
+          curs.execute(f"UPDATE hgnc_stage s SET via = '{col}' WHERE via IS NULL AND s.{col} IS NOT NULL AND EXISTS (SELECT 1 FROM target t WHERE t.{col} = s.{col})")
+          curs.execute(f"INSERT INTO hgnc_match SELECT s.line_no, t.id FROM hgnc_stage s JOIN target t ON t.{col} = s.{col} WHERE s.via = '{col}'")
+        # Each target is annotated from the first line that matches it
+        curs.execute("CREATE TEMPORARY TABLE hgnc_first (PRIMARY KEY (target_id)) SELECT target_id, MIN(line_no) AS line_no FROM hgnc_match GROUP BY target_id")
+        curs.execute("CREATE TEMPORARY TABLE hgnc_annot (PRIMARY KEY (target_id)) SELECT f.target_id, s.hgnc_id, s.sym, s.chr, s.geneid, t.sym AS t_sym, t.geneid AS t_geneid, t.uniprot FROM hgnc_first f JOIN hgnc_stage s ON s.line_no = f.line_no JOIN target t ON t.id = f.target_id")
+        curs.execute("SELECT COUNT(*) FROM hgnc_annot")
+        rv['target_ct'] = curs.fetchone()[0]
+        curs.execute("SELECT sym, geneid, uniprot FROM hgnc_stage WHERE via IS NULL AND uniprot IS NOT NULL ORDER BY line_no")
+        rv['notfnd'] = curs.fetchall()
+        # Discrepancies and missing values, before the updates
+        curs.execute("SELECT t_sym, sym FROM hgnc_annot WHERE t_sym IS NOT NULL AND BINARY t_sym <> BINARY sym")
+        rv['symdiscrs'] = curs.fetchall()
+        curs.execute("SELECT t_geneid, geneid FROM hgnc_annot WHERE t_geneid IS NOT NULL AND geneid IS NOT NULL AND t_geneid <> geneid")
+        rv['geneiddiscrs'] = curs.fetchall()
+        curs.execute("SELECT target_id, uniprot, sym FROM hgnc_annot WHERE t_sym IS NULL")
+        rv['new_syms'] = curs.fetchall()
+        curs.execute("SELECT target_id, uniprot, geneid FROM hgnc_annot WHERE t_geneid IS NULL AND geneid IS NOT NULL")
+        rv['new_geneids'] = curs.fetchall()
+        # Inserts and updates
+        curs.execute("INSERT IGNORE INTO xref (target_id, xtype, value) SELECT target_id, 'HGNC ID', REPLACE(hgnc_id, 'HGNC:', '') FROM hgnc_annot")
+        rv['hgnc_ct'] = curs.rowcount
+        curs.execute("UPDATE target t JOIN hgnc_annot a ON a.target_id = t.id SET t.chr = a.chr")
+        rv['chr_ct'] = rv['target_ct']
+        curs.execute("UPDATE target t JOIN hgnc_annot a ON a.target_id = t.id SET t.sym = a.sym WHERE a.t_sym IS NULL")
+        rv['sym_ct'] = curs.rowcount
+        curs.execute("UPDATE target t JOIN hgnc_annot a ON a.target_id = t.id SET t.geneid = a.geneid WHERE a.t_geneid IS NULL AND a.geneid IS NOT NULL")
+        rv['geneid_ct'] = curs.rowcount
+        self._conn.commit()
+      except Error as e:
+        self._logger.error(f"MySQL Error in upd_targets_hgnc(): {e}")
+        self._conn.rollback()
+        return False
+      finally:
+        curs.execute("DROP TEMPORARY TABLE IF EXISTS hgnc_stage, hgnc_match, hgnc_first, hgnc_annot")
+    return rv
+
+  def _create_hgnc_stage(self, curs):
+    '''
+    Function  : Create the HGNC staging table
+    Arguments : A cursor
+    Returns   : N/A
+    Scope     : Private
+    Comments  : The staging table gets the character set and collation of
+                the target table, so that joins on string columns can use
+                the target table's indexes.
+    '''
+    curs.execute("SELECT TABLE_COLLATION FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'target'")
+    collation = curs.fetchone()[0]
+    charset = collation.split('_')[0]
+    curs.execute("DROP TEMPORARY TABLE IF EXISTS hgnc_stage, hgnc_match, hgnc_first, hgnc_annot")
+    curs.execute(f"""CREATE TEMPORARY TABLE hgnc_stage (
+                       line_no INT NOT NULL PRIMARY KEY,
+                       hgnc_id VARCHAR(20) NOT NULL,
+                       sym VARCHAR(255) NOT NULL,
+                       chr VARCHAR(255),
+                       geneid INT,
+                       uniprot VARCHAR(20),
+                       via VARCHAR(10),
+                       KEY (sym), KEY (geneid), KEY (uniprot)
+                     ) DEFAULT CHARSET={charset} COLLATE={collation}""")
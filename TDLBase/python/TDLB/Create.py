@@ -140,6 +140,40 @@ class CreateMethodsMixin:
         return False
     return True
 
+  def ins_xrefs(self, inits, commit=True):
+    '''
+    Function  : Insert many xrefs with a few multi-row statements
+    Arguments : A list of dictionaries with the same keys as ins_xref()
+    Returns   : The number of rows inserted, or False on error
+    Scope     : Public
+    Comments  : Like ins_xref(), this silently skips xrefs that already exist
+    '''
+    params = []
+    for init in inits:
+      if 'xtype' not in init or 'target_id' not in init or 'value' not in init:
+        self.warning(f"Invalid parameters sent to ins_xrefs(): {init}")
+        return False
+      params.append( (init['target_id'], init['xtype'], init['value'], init.get('xtra')) )
+    sql = "INSERT IGNORE INTO xref (target_id, xtype, value, xtra) VALUES (%s, %s, %s, %s)"
+    self._logger.debug(f"SQLpat: {sql}")
+    with closing(self._conn.cursor()) as curs:
+      try:
+        curs.executemany(sql, params)
+        row_ct = curs.rowcount
+      except Error as e:
+        self._logger.error(f"MySQL Error in ins_xrefs(): {e}")
+        self._logger.error(f"SQLpat: {sql}")
+        self._conn.rollback()
+        return False
+    if commit:
+      try:
+        self._conn.commit()
+      except Error as e:
+        self._logger.error(f"MySQL commit error in ins_xrefs(): {e}")
+        self._conn.rollback()
+        return False
+    return row_ct
+
   def ins_tdl_info(self, init, commit=True):
     if 'itype' in init:
       itype = init['itype']
@@ -191,6 +225,42 @@ class CreateMethodsMixin:
         return False
     return True
 
+  def ins_tdl_infos(self, inits, commit=True):
+    '''
+    Function  : Insert many tdl_infos with a few multi-row statements
+    Arguments : A list of dictionaries with the same keys as ins_tdl_info()
+    Returns   : The number of rows inserted, or False on error
+    Scope     : Public
+    '''
+    rows = {}
+    for init in inits:
+      val_col = next((c for c in ['string_value', 'integer_value', 'number_value', 'boolean_value', 'date_value'] if c in init), None)
+      if 'target_id' not in init or 'itype' not in init or not val_col:
+        self.warning(f"Invalid parameters sent to ins_tdl_infos(): {init}")
+        return False
+      rows.setdefault(val_col, []).append( (init['target_id'], init['itype'], init[val_col]) )
+    ct = 0
+    with closing(self._conn.cursor()) as curs:
+      for val_col,params in rows.items():
+        sql = "INSERT INTO tdl_info (target_id, itype, %s) VALUES (%%s, %%s, %%s)" % val_col
+        self._logger.debug(f"SQLpat: {sql}")
+        try:
+          curs.executemany(sql, params)
+          ct += len(params)
+        except Error as e:
+          self._logger.error(f"MySQL Error in ins_tdl_infos(): {e}")
+          self._logger.error(f"SQLpat: {sql}")
+          self._conn.rollback()
+          return False
+    if commit:
+      try:
+        self._conn.commit()
+      except Error as e:
+        self._logger.error(f"MySQL commit error in ins_tdl_infos(): {e}")
+        self._conn.rollback()
+        return False
+    return ct
+
   def ins_generif(self, init, commit=True):
     if 'target_id' in init and 'text' in init:
       params = [init['target_id'], init['text']]
@@ -314,6 +384,45 @@ class CreateMethodsMixin:
         return False
     return True
   
+  def ins_drug_activities(self, inits, commit=True):
+    '''
+    Function  : Insert many drug_activities with one multi-row statement
+    Arguments : A list of dictionaries with the same keys as ins_drug_activity()
+    Returns   : The number of rows inserted, or False on error
+    Scope     : Public
+    Comments  : All rows are inserted with the union of the optional columns
+                of inits, with NULL where a dictionary does not have one.
+                With commit=False, any number of calls can be made in one
+                transaction, which is committed by a final call with
+                commit=True (inits may be empty).
+    '''
+    optcols = ['act_value', 'act_type', 'action_type', 'source', 'reference', 'smiles', 'cmpd_chemblid', 'cmpd_pubchem_cid', 'nlm_drug_info']
+    for init in inits:
+      if 'target_id' not in init or 'drug' not in init or 'dcid' not in init or 'has_moa' not in init:
+        self.warning(f"Invalid parameters sent to ins_drug_activities(): {init}")
+        return False
+    cols = ['target_id', 'drug', 'dcid', 'has_moa'] + [ c for c in optcols if any(c in init for init in inits) ]
+    params = [ tuple(init.get(c) for c in cols) for init in inits ]
+    sql = "INSERT INTO drug_activity (%s) VALUES (%s)" % (','.join(cols), ','.join(['%s']*len(cols)))
+    self._logger.debug(f"SQLpat: {sql}")
+    with closing(self._conn.cursor()) as curs:
+      try:
+        if params:
+          curs.executemany(sql, params)
+      except Error as e:
+        self._logger.error(f"MySQL Error in ins_drug_activities(): {e}")
+        self._logger.error(f"SQLpat: {sql}")
+        self._conn.rollback()
+        return False
+    if commit:
+      try:
+        self._conn.commit()
+      except Error as e:
+        self._logger.error(f"MySQL commit error in ins_drug_activities(): {e}")
+        self._conn.rollback()
+        return False
+    return len(params)
+
   def ins_cmpd_activity(self, init, commit=True):
     if 'target_id' in init and 'catype' in init and 'cmpd_id_in_src' in init:
       params = [init['target_id'], init['catype'], init['cmpd_id_in_src']]
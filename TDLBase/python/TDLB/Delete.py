@@ -28,7 +28,7 @@ class DeleteMethodsMixin:
         return False
     return row_ct
 
-  def del_tdl_infos(self, itype):
+  def del_tdl_infos(self, itype, commit=True):
     if not itype:
       self.warning("No itype sent to del_tdl_infos()")
       return False
@@ -36,7 +36,10 @@ class DeleteMethodsMixin:
     with closing(self._conn.cursor()) as curs:
       try:
         curs.execute(sql, (itype,))
-        self._conn.commit()
+        # with commit=False, the delete is committed (or rolled back) with
+        # the inserts that follow it, eg. by ins_tdl_infos()
+        if commit:
+          self._conn.commit()
         row_ct = curs.rowcount
       except Error as e:
         self._logger.error(f"MySQL Error in del_tdl_infos() for itype {itype}: {e}")
@@ -59,3 +62,27 @@ class DeleteMethodsMixin:
         self._conn.rollback()
         return False
     return row_ct
+
+  def del_drug_activities(self, commit=True):
+    '''
+    Function  : Delete all drug_activity rows
+    Arguments : N/A
+    Returns   : The number of rows deleted, or False on error
+    Scope     : Public
+    Comments  : Unlike del_all_rows(), AUTO_INCREMENT is not reset, as
+                ALTER TABLE commits implicitly. So, with commit=False, the
+                delete can be rolled back with the inserts that follow it
+                in the same transaction (see ins_drug_activities()).
+    '''
+    sql = "DELETE FROM drug_activity"
+    with closing(self._conn.cursor()) as curs:
+      try:
+        curs.execute(sql)
+        row_ct = curs.rowcount
+        if commit:
+          self._conn.commit()
+      except Error as e:
+        self._logger.error(f"MySQL Error in del_drug_activities(): {e}")
+        self._conn.rollback()
+        return False
+    return row_ct
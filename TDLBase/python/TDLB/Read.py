@@ -23,6 +23,36 @@ class ReadMethodsMixin:
       ids = [row[0] for row in curs.fetchall()]
     return ids
 
+  def get_status_counter(self, name):
+    '''
+    Function  : Get the value of a MySQL server status counter
+    Arguments : The counter's name, eg. 'Questions'
+    Returns   : An integer, or None if there is no such counter
+    Scope     : Public
+    Comments  : Global status is used, so the value counts the statements of
+                all sessions, including other programs' connections.
+    '''
+    with closing(self._conn.cursor()) as curs:
+      curs.execute("SHOW GLOBAL STATUS LIKE %s", (name,))
+      row = curs.fetchone()
+    return int(row[1]) if row else None
+
+  def get_uniprot_map(self):
+    '''
+    Function  : Get a mapping of UniProt accessions to target ids
+    Arguments : N/A
+    Returns   : A dictionary of UniProt accession: target id
+    Scope     : Public
+    Comments  : Use this instead of find_target_ids({'uniprot': acc}) when
+                resolving many accessions. If more than one target has an
+                accession, the one with the lowest id is used.
+    '''
+    sql = "SELECT uniprot, id FROM target ORDER BY id DESC"
+    with closing(self._conn.cursor()) as curs:
+      curs.execute(sql)
+      up2tid = {row[0]: row[1] for row in curs}
+    return up2tid
+
   def find_target_ids(self, q, incl_alias=False):
     '''
     Function  : Find id(s) of target(s) that satisfy the input query criteria
@@ -249,3 +279,34 @@ class ReadMethodsMixin:
       curs.execute("SELECT * FROM drug_activity")
       drug_activities = [row for row in curs.fetchall()]
     return drug_activities
+
+  def iter_goas(self, evidence=None, aspects=None):
+    '''
+    Function  : Stream GO annotations, ordered by target id
+    Arguments : Optional lists of GO evidence codes and GO term aspects
+                (the first letter of goa.go_term: 'F', 'P' or 'C')
+    Returns   : A generator of dictionaries
+    Example   : for goa in dba.iter_goas(evidence=['EXP', 'IDA'], aspects=['F', 'P']):
+    Scope     : Public
+    Comments  : Rows are read from an unbuffered cursor as they are consumed,
+                so other queries cannot be run on this connection until the
+                generator is exhausted.
+    '''
+    sql = "SELECT target_id, go_id, go_term, evidence FROM goa"
+    conds = []
+    params = []
+    if evidence:
+      conds.append("evidence IN (%s)" % ','.join(['%s'] * len(evidence)))
+      params.extend(evidence)
+    if aspects:
+      conds.append("(%s)" % ' OR '.join(["go_term LIKE %s"] * len(aspects)))
+      params.extend([f"{a}:%" for a in aspects])
+    if conds:
+      sql += " WHERE " + " AND ".join(conds)
+    sql += " ORDER BY target_id, id"
+    self._logger.debug(f"SQLpat: {sql}")
+    self._logger.debug(f"SQLparams: {params}")
+    with closing(self._conn.cursor(dictionary=True)) as curs:
+      curs.execute(sql, tuple(params))
+      for row in curs:
+        yield row
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Benchmark the TDLBase loaders end to end on synthetic input files.
+
+Synthetic UniProt XML, Evidence Ontology, HGNC TSV and UniProt ID Mapping
+files are generated at the given scale, and each loader is run on them, in
+order, against a TDLBase MySQL DB. For each loader, records/sec, peak RSS
+and MySQL statements issued per record are reported, and the results are
+appended, with the current git commit, to a JSON file for comparison
+across commits.
+
+The loaders insert targets and annotations, so the DB should be a scratch
+DB with the TDLBase schema. --reset deletes all target data from it first.
+
+Statements are counted with the server's global Questions counter, so the
+counts include those of any other clients of the server.
+
+The loaders are run from OUTDIR/sandbox/python, which is emptied at the
+start of each run, so the files they write relative to their working
+directory (ECO map, ontology and tinit caches, checkpoints) go to
+OUTDIR/sandbox/data instead of the production ../data tree, and every run
+starts with cold caches.
+
+Usage:
+    bench-ETL.py [--dbhost=<str>] [--dbname=<str>] [--entries=<int>] [--loaders=<str>] [--outdir=<dir>] [--results=<file>] [--label=<str>] [--reset] [--seed=<int>]
+    bench-ETL.py -? | --help
+
+Options:
+  -h --dbhost DBHOST   : MySQL database host name [default: localhost]
+  -n --dbname DBNAME   : MySQL database name [default: tdlb_bench]
+  --entries NENTRIES   : number of UniProt entries to generate. The HGNC and
+                         ID Mapping files have 10% more lines, which match
+                         no target. [default: 5000]
+  --loaders LOADERS    : comma-separated list of loaders to run, in order,
+                         from: UniProt, UniProt-pipeline, HGNC, HGNC-bulk,
+                         IDMapping [default: UniProt,HGNC-bulk,IDMapping]
+  --outdir OUTDIR      : directory for the input files and loader output
+                         [default: ../data/bench/]
+  --results RESFILE    : JSON file the results are appended to
+                         [default: ../data/bench/bench-ETL.json]
+  --label LABEL        : label stored with the results
+  --reset              : delete all target data from the DB before loading
+  --seed SEED          : random seed for the input files [default: 1]
+  -? --help            : print this message and exit
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.1.0"
+
+import os,sys,time
+import json
+import gzip
+import random
+import platform
+import shutil
+import subprocess
+from docopt import docopt
+from TDLB.Adaptor import Adaptor
+import slm_util_functions as slmf
+
+PROGRAM = os.path.basename(sys.argv[0])
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Tables with target data, in an order in which they can be emptied
+TARGET_TABLES = ['alias', 'xref', 'tdl_info', 'goa', 'generif', 'pmscore', 'drug_activity', 'cmpd_activity', 'target']
+# ECO IDs used in the generated GO annotations, and the GO evidence codes
+# they are mapped to in the generated Evidence Ontology
+ECO_CODES = {'ECO:0000269': 'EXP', 'ECO:0000314': 'IDA', 'ECO:0000315': 'IMP', 'ECO:0000316': 'IGI',
+             'ECO:0000270': 'IEP', 'ECO:0000353': 'IPI', 'ECO:0000250': 'ISS', 'ECO:0000501': 'IEA'}
+# GO annotations with these ECO IDs are mapped through an is_a parent
+ECO_UNMAPPED = ['ECO:0007005', 'ECO:0007007', 'ECO:0000318']
+
+def loaders(files):
+  """
+  Returns a dict of loader name: (script, arguments, number of records)
+  for the generated files.
+  """
+  return {'UniProt': ('load-UniProt.py', ['--upfile', files['uniprot'], '--ecofile', files['eco']], files['uniprot_ct']),
+          'UniProt-pipeline': ('load-UniProt.py', ['--upfile', files['uniprot'], '--ecofile', files['eco'], '--pipeline'], files['uniprot_ct']),
+          'HGNC': ('load-HGNC.py', ['--infile', files['hgnc']], files['hgnc_ct']),
+          'HGNC-bulk': ('load-HGNC.py', ['--infile', files['hgnc'], '--bulk'], files['hgnc_ct']),
+          'IDMapping': ('load-IDMapping.py', ['--infile', files['idmapping'], '--columns', 'GI,RefSeq,PDB,Ensembl'], files['idmapping_ct'])}
+
+def gene(i):
+  """The synthetic gene of entry i: (accession, symbol, geneid)"""
+  return (f"P{i:05d}" if i < 100000 else f"A{i:07d}", f"SGENE{i}", 100000 + i)
+
+def write_uniprot_xml(fn, n, rng):
+  """
+  Write a UniProt XML file of n human entries. The mix of elements and
+  dbReference types per entry roughly follows that of the Swiss-Prot human
+  file, including elements the loader skips (references, features,
+  evidence).
+  """
+  with open(fn, 'w') as ofh:
+    ofh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    ofh.write('<uniprot xmlns="https://uniprot.org/uniprot" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="https://uniprot.org/uniprot https://www.uniprot.org/docs/uniprot.xsd">\n')
+    for i in range(n):
+      acc, sym, geneid = gene(i)
+      ofh.write(f'<entry dataset="Swiss-Prot" created="2000-05-30" modified="2025-02-05" version="{rng.randint(50, 250)}">\n')
+      ofh.write(f'  <accession>{acc}</accession>\n')
+      for j in range(rng.choice([0, 0, 0, 1, 2, 5])):
+        ofh.write(f'  <accession>Q{i:05d}{j}</accession>\n')
+      ofh.write(f'  <name>{sym}_HUMAN</name>\n')
+      ofh.write(f'  <protein>\n    <recommendedName>\n      <fullName evidence="1">Synthetic protein {i} &amp; friends</fullName>\n')
+      if rng.random() < 0.3:
+        ofh.write(f'      <shortName>SP{i}</shortName>\n')
+      ofh.write('    </recommendedName>\n  </protein>\n')
+      if rng.random() < 0.97:
+        ofh.write(f'  <gene>\n    <name type="primary">{sym}</name>\n')
+        for j in range(rng.choice([0, 1, 1, 2, 4])):
+          ofh.write(f'    <name type="synonym">{sym}S{j}</name>\n')
+        ofh.write(f'    <name type="ORF">ORF{i}</name>\n  </gene>\n')
+      ofh.write('  <organism>\n    <name type="scientific">Homo sapiens</name>\n    <dbReference type="NCBI Taxonomy" id="9606"/>\n  </organism>\n')
+      for j in range(rng.randint(1, 12)):
+        ofh.write(f'  <reference key="{j+1}">\n    <citation type="journal article" date="2004" name="J. Synth. Biol." volume="{j+1}" first="1" last="10">\n')
+        ofh.write(f'      <title>Paper {j} on protein {i}.</title>\n      <authorList>\n        <person name="Smith A."/>\n        <person name="Jones B."/>\n      </authorList>\n')
+        ofh.write(f'      <dbReference type="PubMed" id="{10000000 + i*13 + j}"/>\n    </citation>\n    <scope>FUNCTION</scope>\n  </reference>\n')
+      if rng.random() < 0.9:
+        ofh.write(f'  <comment type="function">\n    <text evidence="2">Synthetic function of protein {i}, which binds things.</text>\n  </comment>\n')
+      ofh.write(f'  <comment type="subcellular location">\n    <subcellularLocation>\n      <location>Cytoplasm</location>\n    </subcellularLocation>\n  </comment>\n')
+      if rng.random() < 0.8:
+        ofh.write(f'  <comment type="similarity">\n    <text evidence="3">Belongs to the synthetic family {i % 500}.</text>\n  </comment>\n')
+      ofh.write(f'  <dbReference type="EMBL" id="AB{i:06d}">\n    <property type="protein sequence ID" value="BAA{i:05d}.1"/>\n    <property type="molecule type" value="mRNA"/>\n  </dbReference>\n')
+      ofh.write(f'  <dbReference type="RefSeq" id="NP_{i:06d}.1">\n    <property type="nucleotide sequence ID" value="NM_{i:06d}.2"/>\n  </dbReference>\n')
+      for j in range(rng.choice([0, 0, 1, 3, 10])):
+        ofh.write(f'  <dbReference type="PDB" id="{i % 10}S{j}{i % 100:02d}">\n    <property type="method" value="X-ray"/>\n    <property type="resolution" value="2.00 A"/>\n  </dbReference>\n')
+      ofh.write(f'  <dbReference type="STRING" id="9606.ENSP{i:011d}"/>\n')
+      if rng.random() < 0.3:
+        ofh.write(f'  <dbReference type="ChEMBL" id="CHEMBL{i}"/>\n')
+      if rng.random() < 0.1:
+        for j in range(rng.randint(1, 4)):
+          ofh.write(f'  <dbReference type="DrugBank" id="DB{i % 10000:05d}">\n    <property type="generic name" value="Synthdrug {i}-{j}"/>\n  </dbReference>\n')
+      ofh.write(f'  <dbReference type="Ensembl" id="ENST{i:011d}.1">\n    <property type="protein sequence ID" value="ENSP{i:011d}.1"/>\n    <property type="gene ID" value="ENSG{i:011d}.1"/>\n  </dbReference>\n')
+      ofh.write(f'  <dbReference type="GeneID" id="{geneid}"/>\n')
+      if rng.random() < 0.02:
+        ofh.write(f'  <dbReference type="GeneID" id="{900000 + i}"/>\n')
+      if rng.random() < 0.3:
+        ofh.write(f'  <dbReference type="MIM" id="{600000 + i}">\n    <property type="type" value="gene"/>\n  </dbReference>\n')
+      for j in range(rng.choice([1, 3, 5, 10, 20, 40])):
+        aspect = rng.choice(['C', 'F', 'P', 'P'])
+        eco = rng.choice(list(ECO_CODES) + ECO_UNMAPPED)
+        ofh.write(f'  <dbReference type="GO" id="GO:{rng.randint(1, 50000):07d}">\n    <property type="term" value="{aspect}:synthetic term {j}"/>\n')
+        ofh.write(f'    <property type="evidence" value="{eco}"/>\n    <property type="project" value="UniProtKB"/>\n  </dbReference>\n')
+      for dtype,prefix in [('InterPro', 'IPR'), ('Pfam', 'PF'), ('PROSITE', 'PS'), ('SMART', 'SM')]:
+        for j in range(rng.choice([0, 1, 1, 2, 3])):
+          ofh.write(f'  <dbReference type="{dtype}" id="{prefix}{(i*7 + j) % 30000:05d}">\n    <property type="entry name" value="{dtype}_dom{j}"/>\n')
+          ofh.write(f'    <property type="match status" value="1"/>\n  </dbReference>\n')
+      ofh.write(f'  <dbReference type="PANTHER" id="PTHR{i % 20000:05d}">\n    <property type="entry name" value="SYNTHETIC FAMILY"/>\n  </dbReference>\n')
+      ofh.write(f'  <dbReference type="Reactome" id="R-HSA-{i}">\n    <property type="pathway name" value="Synthetic pathway"/>\n  </dbReference>\n')
+      for j in range(rng.randint(1, 8)):
+        ofh.write(f'  <keyword id="KW-{(i + j*37) % 1200:04d}">Keyword {(i + j*37) % 1200}</keyword>\n')
+      for j in range(rng.randint(1, 40)):
+        ofh.write(f'  <feature type="chain" id="PRO_{i:07d}{j}" description="Synthetic feature {j}">\n    <location>\n      <begin position="{j+1}"/>\n      <end position="{j+10}"/>\n    </location>\n  </feature>\n')
+      for j in range(rng.randint(1, 6)):
+        ofh.write(f'  <evidence type="ECO:0000269" key="{j+1}">\n    <source>\n      <dbReference type="PubMed" id="{20000000 + j}"/>\n    </source>\n  </evidence>\n')
+      length = rng.randint(50, 1500)
+      seq = ''.join(rng.choice('ACDEFGHIKLMNPQRSTVWY') for _ in range(length))
+      ofh.write(f'  <sequence length="{length}" mass="{length*110}" checksum="{i:016X}" modified="2000-05-30" version="{rng.randint(1, 4)}">')
+      ofh.write('\n'.join(seq[k:k+60] for k in range(0, length, 60)))
+      ofh.write('</sequence>\n</entry>\n')
+    ofh.write('<copyright>\nCopyrighted by the UniProt Consortium, see https://www.uniprot.org/terms\n</copyright>\n</uniprot>\n')
+
+def write_eco_obo(fn):
+  """
+  Write an Evidence Ontology file mapping ECO_CODES, in which the
+  ECO_UNMAPPED terms are is_a children of mapped terms.
+  """
+  with open(fn, 'w') as ofh:
+    ofh.write("format-version: 1.2\ndata-version: eco/releases/2025-01-01\nontology: eco\n\n")
+    ofh.write("[Term]\nid: ECO:0000000\nname: evidence\n\n")
+    for eco,code in ECO_CODES.items():
+      ofh.write(f"[Term]\nid: {eco}\nname: synthetic evidence {code}\nis_a: ECO:0000000 ! evidence\nxref: GOECO:{code} \"bijective\"\n\n")
+    mapped = list(ECO_CODES)
+    for i,eco in enumerate(ECO_UNMAPPED):
+      ofh.write(f"[Term]\nid: {eco}\nname: synthetic unmapped evidence {i}\nis_a: {mapped[i]}\n\n")
+
+def write_hgnc_tsv(fn, n, rng):
+  """
+  Write an HGNC TSV file with a line for each of n entries, matching its
+  target by symbol, or if the symbol is changed by geneid or uniprot, and
+  10% more lines that match no target.
+  """
+  with open(fn, 'w') as ofh:
+    ofh.write("HGNC ID\tApproved symbol\tApproved name\tStatus\tChromosome\tNCBI Gene ID\tUniProt ID\n")
+    for i in range(n):
+      acc, sym, geneid = gene(i)
+      r = rng.random()
+      if r < 0.05:
+        sym = f"HSYM{i}"
+      elif r < 0.08:
+        sym, geneid = f"HSYM{i}", ''
+      ofh.write(f"HGNC:{i+1}\t{sym}\tsynthetic gene {i}\tApproved\t{rng.randint(1, 22)}q{rng.randint(11, 35)}.{rng.randint(1, 3)}\t{geneid}\t{acc}\n")
+    for i in range(n, n + n // 10):
+      ofh.write(f"HGNC:{i+1}\tNOTARGET{i}\tsynthetic non-coding gene {i}\tApproved\t{rng.randint(1, 22)}p{rng.randint(11, 35)}\t{100000 + i}\t{'X%05d' % i if i % 2 else ''}\n")
+
+def write_idmapping(fn, n, rng):
+  """
+  Write a gzipped UniProt ID Mapping (idmapping_selected.tab) file with a
+  line for each of n entries, and 10% more lines for unknown accessions.
+  """
+  with gzip.open(fn, 'wt') as ofh:
+    for i in range(n + n // 10):
+      acc, sym, geneid = gene(i) if i < n else (f"X{i:07d}", f"XGENE{i}", 100000 + i)
+      multi = lambda fmt, k: '; '.join(fmt.format(i, j) for j in range(k))
+      cols = [acc, f"{sym}_HUMAN", str(geneid),
+              multi("NP_{:06d}.{}", rng.randint(1, 3)),
+              multi("{}{:02d}", rng.randint(1, 6)),
+              multi("{}P{}", rng.choice([0, 0, 1, 4])),
+              multi("GO:{:05d}{:02d}", rng.randint(1, 20)),
+              f"UniRef100_{acc}", f"UniRef90_{acc}", f"UniRef50_{acc}", f"UPI{i:010d}",
+              '', '9606', str(600000 + i) if rng.random() < 0.3 else '', '',
+              multi("{}{:02d}", rng.randint(1, 15)),
+              multi("AB{:06d}{}", rng.randint(1, 3)), multi("BAA{:05d}.{}", rng.randint(1, 3)),
+              f"ENSG{i:011d}", multi("ENST{:011d}{}", rng.randint(1, 4)), multi("ENSP{:011d}{}", rng.randint(1, 4)),
+              '']
+      ofh.write('\t'.join(cols) + '\n')
+
+def generate(outdir, n, seed, quiet=False):
+  """Write the synthetic input files in outdir and return a dict of their names and record counts."""
+  rng = random.Random(seed)
+  files = {'uniprot': os.path.join(outdir, 'uniprot_synthetic.xml'), 'uniprot_ct': n,
+           'eco': os.path.join(outdir, 'eco_synthetic.obo'),
+           'hgnc': os.path.join(outdir, 'hgnc_synthetic.tsv'), 'hgnc_ct': n + n // 10,
+           'idmapping': os.path.join(outdir, 'idmapping_synthetic.tab.gz'), 'idmapping_ct': n + n // 10}
+  if not quiet:
+    print(f"\nGenerating synthetic input files for {n} entries in {outdir}")
+  write_uniprot_xml(files['uniprot'], n, rng)
+  write_eco_obo(files['eco'])
+  write_hgnc_tsv(files['hgnc'], n, rng)
+  write_idmapping(files['idmapping'], n, rng)
+  return files
+
+def run_loader(name, script, loader_args, records, dba, args):
+  """
+  Run a loader script in a child process and return its results dict. The
+  peak RSS is the child's own, from wait4().
+  """
+  outdir = args['--outdir']
+  cwd = os.path.join(outdir, 'sandbox', 'python')
+  cmd = [sys.executable, os.path.join(SCRIPT_DIR, script), '--dbhost', args['--dbhost'], '--dbname', args['--dbname'],
+         '--quiet', '--logfile', os.path.join(outdir, f"{name}.log")] + loader_args
+  print(f"\nRunning {name}: {' '.join(cmd[1:])}")
+  q0 = dba.get_status_counter('Questions')
+  t0 = time.perf_counter()
+  with open(os.path.join(outdir, f"{name}.out"), 'w') as ofh:
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=ofh, stderr=subprocess.STDOUT)
+    (_, status, rusage) = os.wait4(proc.pid, 0)
+  elapsed = time.perf_counter() - t0
+  q1 = dba.get_status_counter('Questions')
+  rc = os.waitstatus_to_exitcode(status)
+  proc.returncode = rc
+  # the two SHOW STATUS statements are not the loader's
+  queries = q1 - q0 - 1
+  # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+  max_rss_mb = rusage.ru_maxrss / (1024*1024 if sys.platform == 'darwin' else 1024)
+  res = {'loader': name, 'command': cmd[1:], 'returncode': rc, 'records': records,
+         'elapsed': round(elapsed, 3), 'recs_per_sec': round(records / elapsed, 1),
+         'user_cpu': round(rusage.ru_utime, 3), 'sys_cpu': round(rusage.ru_stime, 3),
+         'max_rss_mb': round(max_rss_mb, 1), 'queries': queries, 'queries_per_rec': round(queries / records, 2)}
+  if rc != 0:
+    print(f"WARNING: {name} exited with status {rc}. See {ofh.name} for details.")
+  return res
+
+def git_info():
+  """Return the current git commit hash and whether the work tree has changes, or (None, None)."""
+  try:
+    commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPT_DIR, capture_output=True, text=True, check=True).stdout != ''
+  except (OSError, subprocess.CalledProcessError):
+    return None, None
+  return commit, dirty
+
+def save_results(fn, run):
+  """Append run to the list of runs in JSON file fn"""
+  runs = []
+  os.makedirs(os.path.dirname(os.path.abspath(fn)), exist_ok=True)
+  if os.path.exists(fn):
+    with open(fn) as ifh:
+      runs = json.load(ifh)
+  runs.append(run)
+  tmpfn = fn + '.tmp'
+  with open(tmpfn, 'w') as ofh:
+    json.dump(runs, ofh, indent=2)
+  os.replace(tmpfn, fn)
+
+def report(results):
+  cols = ['loader', 'records', 'elapsed', 'recs_per_sec', 'max_rss_mb', 'queries', 'queries_per_rec']
+  widths = [ max(len(col), *(len(str(r[col])) for r in results)) for col in cols ]
+  print("\n" + "  ".join(col.rjust(w) if i else col.ljust(w) for i,(col,w) in enumerate(zip(cols, widths))))
+  for r in results:
+    print("  ".join(str(r[col]).rjust(w) if i else str(r[col]).ljust(w) for i,(col,w) in enumerate(zip(cols, widths))))
+
+
+if __name__ == '__main__':
+  print("\n{} (v{}) [{}]:".format(PROGRAM, __version__, time.strftime("%c")))
+  start_time = time.time()
+
+  args = docopt(__doc__, version=__version__)
+  n = int(args['--entries'])
+  outdir = args['--outdir'] = os.path.abspath(args['--outdir'])
+  os.makedirs(outdir, exist_ok=True)
+  files = generate(outdir, n, int(args['--seed']))
+  all_loaders = loaders(files)
+  names = args['--loaders'].split(',')
+  for name in names:
+    if name not in all_loaders:
+      sys.exit(f"ERROR: Unknown loader {name}. Available loaders are: {', '.join(all_loaders)}")
+
+  dba_params = {'dbhost': args['--dbhost'], 'dbname': args['--dbname'], 'logger_name': __name__}
+  dba = Adaptor(dba_params)
+  dbi = dba.get_dbinfo()
+  print("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+  if args['--reset']:
+    for table in TARGET_TABLES:
+      if dba.del_all_rows(table) is False:
+        sys.exit(f"ERROR: Could not delete rows from table {table}")
+    print(f"Deleted all target data from {args['--dbname']}")
+
+  # the loaders' working directory, see the module docstring
+  sandbox = os.path.join(outdir, 'sandbox')
+  if os.path.exists(sandbox):
+    shutil.rmtree(sandbox)
+  for d in ['python', 'data', 'log']:
+    os.makedirs(os.path.join(sandbox, d))
+
+  results = []
+  for name in names:
+    script, loader_args, records = all_loaders[name]
+    results.append( run_loader(name, script, loader_args, records, dba, args) )
+  report(results)
+
+  commit, dirty = git_info()
+  run = {'date': time.strftime("%Y-%m-%dT%H:%M:%S"), 'label': args['--label'], 'git_commit': commit, 'git_dirty': dirty,
+         'host': platform.node(), 'python': platform.python_version(), 'dbhost': args['--dbhost'],
+         'entries': n, 'seed': int(args['--seed']), 'results': results}
+  save_results(args['--results'], run)
+  print(f"\nResults appended to {args['--results']}")
+
+  elapsed = time.time() - start_time
+  print("\n{}: Done. Elapsed time: {}\n".format(PROGRAM, slmf.secs2str(elapsed)))
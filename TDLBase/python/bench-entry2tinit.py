@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Benchmark load-UniProt.py's entry2tinit() and check its output against the original lxml.objectify implementation.
+
+Usage:
+    bench-entry2tinit.py [--repeat=<int>] [--eco=<file>] <xmlfile>
+    bench-entry2tinit.py -? | --help
+
+Options:
+  --repeat NREP        : number of timed passes over the entries [default: 3]
+  --eco ECOFILE        : Evidence Ontology file used to map GO evidence
+                         (default is to map every ECO ID in the XML file)
+  -? --help            : print this message and exit 
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+
+import os,sys,time,re
+import importlib.util
+from docopt import docopt
+from lxml import objectify
+import slm_util_functions as slmf
+import warnings
+warnings.simplefilter(action='ignore', category=FutureWarning)
+
+PROGRAM = os.path.basename(sys.argv[0])
+
+def import_script(fn):
+  """Import a script whose file name is not a valid module name (eg. load-UniProt.py)."""
+  name = os.path.basename(fn).replace('-', '_').replace('.py', '')
+  spec = importlib.util.spec_from_file_location(name, fn)
+  mod = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(mod)
+  return mod
+
+lu = import_script(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load-UniProt.py'))
+NS = lu.NS
+
+def entry2tinit_objectify(entry, e2e):
+  """
+  The original entry2tinit(), using lxml.objectify attribute access. This is the reference for output checks.
+  """
+  target = {'name': entry.name.text, 'description': entry.protein.recommendedName.fullName.text, 'uniprot': entry.accession.text}
+  target['sym'] = None
+  aliases = []
+  if entry.find(NS+'gene'):
+    if entry.gene.find(NS+'name'):
+      for gn in entry.gene.name: # returns all gene.names
+        if gn.get('type') == 'primary':
+          target['sym'] = gn.text
+        elif gn.get('type') == 'synonym':
+          # HGNC symbol alias
+          aliases.append( {'atype': 'symbol', 'value': gn.text} )
+  target['seq'] = str(entry.sequence).replace('\n', '')
+  target['up_version'] = entry.sequence.get('version')
+  for acc in entry.accession: # returns all accessions
+    if str(acc) != target['uniprot']:
+      aliases.append( {'atype': 'uniprot', 'value': str(acc)} )
+  if entry.protein.recommendedName.find(NS+'shortName') != None:
+    sn = entry.protein.recommendedName.shortName.text
+    aliases.append( {'atype': 'uniprot', 'value': sn} )
+  target['aliases'] = aliases
+  # Function and Family TDL Infos (from comments)
+  tdl_infos = []
+  if entry.find(NS+'comment'):
+    for c in entry.comment:
+      if c.get('type') == 'function':
+        tdl_infos.append( {'itype': 'UniProt Function',  'string_value': str(c.getchildren()[0])} )
+      if c.get('type') == 'similarity':
+        tdl_infos.append( {'itype': 'UniProt Family',  'string_value': str(c.getchildren()[0])} )
+  target['tdl_infos'] = tdl_infos
+  # GeneID, XRefs, GOAs from dbReferences
+  xrefs = []
+  goas = []
+  for dbr in entry.dbReference:
+    if dbr.attrib['type'] == 'GeneID':
+      # Some UniProt records have multiple Gene IDs
+      # So, only take the first one and fix manually after loading
+      if 'geneid' not in target:
+        target['geneid'] = str(dbr.attrib['id'])
+    elif dbr.attrib['type'] in ['InterPro', 'Pfam', 'PROSITE', 'SMART']:
+      xtra = None
+      for el in dbr.findall(NS+'property'):
+        if el.attrib['type'] == 'entry name':
+          xtra = str(el.attrib['value'])
+        xrefs.append( {'xtype': str(dbr.attrib['type']),
+                       'value': str(dbr.attrib['id']), 'xtra': xtra} )
+    elif dbr.attrib['type'] == 'GO':
+      name = None
+      goeco = None
+      assigned_by = None
+      for el in dbr.findall(NS+'property'):
+        if el.attrib['type'] == 'term':
+          name = str(el.attrib['value'])
+        elif el.attrib['type'] == 'evidence':
+          goeco = str(el.attrib['value'])
+        elif el.attrib['type'] == 'project':
+          assigned_by = str(el.attrib['value'])
+        if goeco in e2e:
+          goas.append( {'go_id': str(dbr.attrib['id']), 'go_term': name,
+                        'goeco': goeco, 'evidence': e2e[goeco],
+                        'assigned_by': assigned_by} )
+    elif dbr.attrib['type'] == 'Ensembl':
+      xrefs.append( {'xtype': 'Ensembl', 'value': str(dbr.attrib['id'])} )
+      for el in dbr.findall(NS+'property'):
+        if el.attrib['type'] == 'protein sequence ID':
+          xrefs.append( {'xtype': 'Ensembl', 'value': str(el.attrib['value'])} )
+        elif el.attrib['type'] == 'gene ID':
+          xrefs.append( {'xtype': 'Ensembl', 'value': str(el.attrib['value'])} )
+    elif dbr.attrib['type'] == 'STRING':
+      xrefs.append( {'xtype': 'STRING', 'value': str(dbr.attrib['id'])} )
+    elif dbr.attrib['type'] == 'DrugBank':
+      xtra = None
+      for el in dbr.findall(NS+'property'):
+        if el.attrib['type'] == 'generic name':
+          xtra = str(el.attrib['value'])
+      xrefs.append( {'xtype': 'DrugBank', 'value': str(dbr.attrib['id']),
+                     'xtra': xtra} )
+    elif dbr.attrib['type'] in ['BRENDA', 'ChEMBL', 'MIM', 'PANTHER', 'PDB', 'RefSeq', 'UniGene']:
+        xrefs.append( {'xtype': str(dbr.attrib['type']), 'value': str(dbr.attrib['id'])} )
+  target['goas'] = goas
+  # Keywords
+  for kw in entry.keyword:
+    xrefs.append( {'xtype': 'UniProt Keyword', 'value': str(kw.attrib['id']),
+                   'xtra': str(kw)} )
+  target['xrefs'] = xrefs
+  return target
+
+def timeit(func, entries, e2e, repeat):
+  """Return the best time of repeat passes of func over entries, and the output of the last pass."""
+  best = None
+  for _ in range(repeat):
+    t0 = time.perf_counter()
+    out = [func(entry, e2e) for entry in entries]
+    t = time.perf_counter() - t0
+    if best is None or t < best:
+      best = t
+  return best, out
+
+
+if __name__ == '__main__':
+  print("\n{} (v{}) [{}]:\n".format(PROGRAM, __version__, time.strftime("%c")))
+  args = docopt(__doc__, version=__version__)
+  fn = args['<xmlfile>']
+  t0 = time.perf_counter()
+  entries = list(objectify.parse(fn).getroot().entry)
+  print(f"Parsed {len(entries)} entries from {fn} in {slmf.secs2str(time.perf_counter() - t0)}")
+  if args['--eco']:
+    e2e = lu.mk_eco_map({'--quiet': True, '--ecofile': args['--eco']})
+  else:
+    with open(fn) as ifh:
+      e2e = {eco: 'EXP' for eco in set(re.findall(r'"(ECO:\d+)"', ifh.read()))}
+  repeat = int(args['--repeat'])
+  results = {}
+  for label,func in [('objectify', entry2tinit_objectify), ('entry2tinit', lu.entry2tinit)]:
+    t, out = timeit(func, entries, e2e, repeat)
+    results[label] = out
+    print(f"  {label:12}: {slmf.secs2str(t)} ({len(entries)/t:.0f} entries/sec)")
+  diff_ct = 0
+  for entry,a,b in zip(entries, results['objectify'], results['entry2tinit']):
+    if a != b:
+      diff_ct += 1
+      if diff_ct == 1:
+        print(f"First difference, for entry {entry.accession}:\n  objectify:   {a}\n  entry2tinit: {b}")
+  if diff_ct:
+    print(f"ERROR: Output differs for {diff_ct} entries")
+    sys.exit(1)
+  print(f"Output is identical for all {len(entries)} entries")
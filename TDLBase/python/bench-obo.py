@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark obo.Parser against obo.FastParser and check that they produce identical output.
+
+Each OBO file given is parsed by both parsers. A synthetic GO-sized OBO file
+is also generated and parsed, unless --terms is 0.
+
+Usage:
+    bench-obo.py [--terms=<int>] [<obofile>...]
+    bench-obo.py -? | --help
+
+Options:
+  --terms NTERMS       : number of terms in the generated OBO file [default: 50000]
+  -? --help            : print this message and exit
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+
+import os,sys,time
+import tempfile
+from docopt import docopt
+import obo
+import slm_util_functions as slmf
+
+PROGRAM = os.path.basename(sys.argv[0])
+
+def write_obo_fixture(fn, n):
+  """
+  Write an OBO file with n GO-like terms, using the OBO features the parsers
+  handle differently: quoted values with escapes and modifiers, '!' comments
+  (and '!' in quotes), continuation lines and typedefs.
+  """
+  namespaces = ['biological_process', 'molecular_function', 'cellular_component']
+  with open(fn, 'w') as ofh:
+    ofh.write("format-version: 1.2\n")
+    ofh.write("data-version: releases/2025-01-01\n")
+    ofh.write("subsetdef: goslim_generic \"Generic GO slim\"\n")
+    ofh.write("ontology: go\n")
+    ofh.write("! A comment line\n\n")
+    for i in range(1, n+1):
+      ofh.write("[Term]\n")
+      ofh.write(f"id: GO:{i:07d}\n")
+      ofh.write(f"name: term {i} process ! a trailing comment\n")
+      ofh.write(f"namespace: {namespaces[i % 3]}\n")
+      ofh.write(f"def: \"Any process that modulates term {i}, a \\\"quoted\\\" thing; see note! \\\\ done.\" [GOC:go_curators, PMID:{10000000+i}]\n")
+      if i % 4 == 0:
+        ofh.write(f"comment: Note\\: see also term {i-1}.\n")
+      ofh.write(f"synonym: \"term {i} synonym\" EXACT [GOC:mah]\n")
+      ofh.write(f"synonym: \"term {i}\\tnarrow\" NARROW []\n")
+      ofh.write(f"xref: Reactome:R-HSA-{i} \"Term {i}\"\n")
+      if i % 10 == 0:
+        ofh.write(f"xref: GOECO:IDA\n")
+      for p in sorted({i // 2, i // 3}):
+        if p > 0:
+          ofh.write(f"is_a: GO:{p:07d} ! term {p} process\n")
+      if i % 5 == 0:
+        ofh.write(f"relationship: part_of GO:{i-1:07d} ! term {i-1}\n")
+      if i % 500 == 0:
+        ofh.write(f"property_value: symbol \"\\u03b1-term {i}\\x21\" xsd:string ! escapes\n")
+        ofh.write(f"property_value: unterminated \"quote ! not a comment\n")
+      if i % 1000 == 0:
+        ofh.write(f"property_value: note \"continued \\\n")
+        ofh.write(f"  value\" xsd:string\n")
+      ofh.write("created_by: synthetic\n\n")
+    ofh.write("[Typedef]\nid: part_of\nname: part of\nxref: BFO:0000050\nis_transitive: true\n")
+
+def parse(cls, fn):
+  """Parse fn with parser class cls and return the elapsed time, headers and stanzas."""
+  t0 = time.perf_counter()
+  parser = cls(fn)
+  stanzas = list(parser)
+  return time.perf_counter() - t0, parser.headers, stanzas
+
+def stanza_key(stanza):
+  return (stanza.name, {tag: [(v.value, v.modifiers) for v in vals] for tag,vals in stanza.tags.items()})
+
+def bench(fn):
+  print(f"\nParsing file {fn} ({os.path.getsize(fn)/1e6:.1f} MB)")
+  t_slow, h_slow, s_slow = parse(obo.Parser, fn)
+  print(f"  Parser     : {slmf.secs2str(t_slow)} ({len(s_slow)} stanzas)")
+  t_fast, h_fast, s_fast = parse(obo.FastParser, fn)
+  print(f"  FastParser : {slmf.secs2str(t_fast)} ({len(s_fast)} stanzas) {t_slow/t_fast:.1f}x")
+  if h_slow != h_fast:
+    print("ERROR: Headers differ")
+    return False
+  if len(s_slow) != len(s_fast):
+    print("ERROR: Stanza counts differ")
+    return False
+  for a,b in zip(s_slow, s_fast):
+    if stanza_key(a) != stanza_key(b):
+      print(f"ERROR: Stanzas differ:\n  Parser:     {a}\n  FastParser: {b}")
+      return False
+  print("  Output is identical")
+  return True
+
+
+if __name__ == '__main__':
+  print("\n{} (v{}) [{}]:".format(PROGRAM, __version__, time.strftime("%c")))
+  args = docopt(__doc__, version=__version__)
+  ok = True
+  for fn in args['<obofile>']:
+    ok = bench(fn) and ok
+  n = int(args['--terms'])
+  if n > 0:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      fn = os.path.join(tmpdir, f"synthetic_{n}.obo")
+      write_obo_fixture(fn, n)
+      ok = bench(fn) and ok
+  if not ok:
+    sys.exit(1)
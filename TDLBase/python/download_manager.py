@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+A download manager for ETL source files.
+
+Downloaded files are stored in a content-addressed cache directory (one
+file per SHA-256 digest) with a JSON manifest recording, for each URL, the
+digest of the last download and the validators the server sent with it
+(ETag, Last-Modified, size). A file is only downloaded again if the server
+says it has changed:
+
+  - for http(s) URLs a conditional GET is sent, and a 304 response means
+    the cached copy is current
+  - for ftp URLs the size and modification time (SIZE and MDTM commands)
+    are compared with the manifest
+
+Cached files are then installed (hard linked or copied, and optionally
+uncompressed) to the paths the ETL scripts read from. Installed files that
+are still current are left untouched, so their modification times only
+change when their content does.
+
+Any number of DownloadManagers, in any number of processes, can share a
+cache directory: the manifest is only changed under an exclusive lock, by
+re-reading it and saving it with just that change, so no entries saved by
+others are lost. Once a file has been downloaded, cached objects that the
+manifest no longer refers to (ie. earlier releases) are removed.
+
+Usage example::
+
+    >>> from download_manager import DownloadManager
+    >>> dlm = DownloadManager()
+    >>> dlm.fetch_all([(ECO_URL, '../data/EvidenceOntology/eco.obo', False),
+    >>>                (UP_URL, '../data/UniProt/uniprot_sprot_human.xml.gz', True)])
+
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.1.0"
+__all__ = ["DownloadManager"]
+
+import os
+import time
+import json
+import gzip
+import shutil
+import hashlib
+import ftplib
+import tempfile
+import threading
+import fcntl
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+
+CACHE_DIR = '../data/cache/'
+MANIFEST = 'manifest.json'
+BLOCK_SIZE = 1024 * 1024
+
+class DownloadManager(object):
+  """Downloads files into a content-addressed cache, only when they have changed."""
+
+  def __init__(self, cache_dir=CACHE_DIR, quiet=False, logger=None):
+    self.cache_dir = cache_dir
+    self.quiet = quiet
+    self.logger = logger
+    os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+    self._manifest_fn = os.path.join(cache_dir, MANIFEST)
+    self.manifest = self._read_manifest()
+    self._lock = threading.Lock()
+
+  def fetch(self, url, dest, uncompress=False):
+    """
+    Make dest a current copy of the file at url. If uncompress is True, dest
+    must end in .gz and is also uncompressed to dest without the .gz suffix.
+    Returns True if the file was downloaded, False if the cached copy was
+    current.
+    """
+    with self._lock:
+      # another DownloadManager may have fetched url since this one started
+      self.manifest = self._read_manifest()
+      entry = self.manifest['urls'].get(url)
+    if entry and not os.path.exists(self._object_path(entry['sha256'])):
+      entry = None
+    if url.startswith('ftp://'):
+      new_entry = self._fetch_ftp(url, entry)
+    else:
+      new_entry = self._fetch_http(url, entry)
+    downloaded = new_entry is not None
+    if downloaded:
+      entry = new_entry
+      tmpfn = entry.pop('tmpfn')
+      # the object is added with its manifest entry, so prune() never sees
+      # it unreferenced
+      with self._locked_manifest() as manifest:
+        os.replace(tmpfn, self._object_path(entry['sha256']))
+        manifest['urls'][url] = entry
+    else:
+      self._msg(f"\n{url} is unchanged since {entry['fetched']}")
+    self._install(entry['sha256'], dest)
+    if uncompress:
+      self._install(entry['sha256'], dest.replace('.gz', ''), uncompress=True)
+    if downloaded:
+      self.prune()
+    return downloaded
+
+  def fetch_all(self, downloads, max_workers=4):
+    """
+    Fetch a list of (url, dest, uncompress) tuples concurrently. Returns a
+    dict of url: fetch() return value.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+      futures = {url: executor.submit(self.fetch, url, dest, uncompress) for url,dest,uncompress in downloads}
+      return {url: f.result() for url,f in futures.items()}
+
+  def prune(self):
+    """
+    Remove cached objects that no manifest entry (of a URL or an installed
+    file) refers to, eg. the previous release of a file once a new one has
+    been downloaded. Returns the number of bytes freed.
+    """
+    freed = 0
+    odir = os.path.join(self.cache_dir, 'objects')
+    with self._locked_manifest() as manifest:
+      keep = set( e['sha256'] for e in manifest['urls'].values() )
+      keep.update( e['sha256'] for e in manifest['installed'].values() )
+      for digest in os.listdir(odir):
+        if digest in keep:
+          continue
+        fn = os.path.join(odir, digest)
+        freed += os.path.getsize(fn)
+        os.remove(fn)
+        self._msg(f"Removed superseded download {fn}")
+    return freed
+
+  def get_digest(self, url):
+    """
+    Return the SHA-256 digest of the last download of url, or None if it has
+    not been downloaded.
+    """
+    with self._lock:
+      self.manifest = self._read_manifest()
+      entry = self.manifest['urls'].get(url)
+    return entry['sha256'] if entry else None
+
+  def get_installed_digest(self, dest):
+    """
+    Return the SHA-256 digest of the download installed to dest, or None if
+    dest was not installed by fetch() or has changed since.
+    """
+    with self._lock:
+      self.manifest = self._read_manifest()
+      inst = self.manifest['installed'].get(dest)
+    if not inst or not os.path.exists(dest):
+      return None
+    st = os.stat(dest)
+    if inst['size'] != st.st_size or inst['mtime'] != st.st_mtime:
+      return None
+    return inst['sha256']
+
+  def _fetch_http(self, url, entry):
+    req = Request(url)
+    if entry:
+      if entry.get('etag'):
+        req.add_header('If-None-Match', entry['etag'])
+      if entry.get('last_modified'):
+        req.add_header('If-Modified-Since', entry['last_modified'])
+    try:
+      resp = urlopen(req)
+    except HTTPError as e:
+      if e.code == 304 and entry:
+        return None
+      raise
+    with resp:
+      new_entry = {'etag': resp.headers.get('ETag'),
+                   'last_modified': resp.headers.get('Last-Modified'),
+                   'size': resp.headers.get('Content-Length')}
+      if entry and self._same_validators(entry, new_entry):
+        # server ignored the conditional headers, but the file is unchanged
+        return None
+      self._msg(f"\nDownloading {url}")
+      new_entry.update(self._store(resp))
+    return new_entry
+
+  def _fetch_ftp(self, url, entry):
+    u = urlparse(url)
+    ftp = ftplib.FTP()
+    try:
+      ftp.connect(u.hostname, u.port or ftplib.FTP_PORT)
+      ftp.login()
+      ftp.voidcmd('TYPE I')
+      # SIZE and MDTM are extensions (RFC 3659) that not all servers
+      # support. Without MDTM the file is always downloaded, as a
+      # changed file may have the same size.
+      try:
+        size = str(ftp.size(u.path))
+      except ftplib.error_perm:
+        size = None
+      try:
+        mdtm = ftp.sendcmd(f"MDTM {u.path}").split()[-1]
+      except ftplib.error_perm:
+        mdtm = None
+        self._msg(f"\n{u.hostname} does not support MDTM, so {url} is downloaded unconditionally")
+      new_entry = {'etag': None, 'last_modified': mdtm, 'size': size}
+      if entry and self._same_validators(entry, new_entry):
+        return None
+      self._msg(f"\nDownloading {url}")
+      with ftp.transfercmd(f"RETR {u.path}") as conn:
+        with conn.makefile('rb') as ifh:
+          new_entry.update(self._store(ifh))
+      ftp.voidresp()
+    finally:
+      ftp.close()
+    return new_entry
+
+  def _same_validators(self, entry, new_entry):
+    if entry.get('etag') and new_entry.get('etag'):
+      return entry['etag'] == new_entry['etag']
+    if not entry.get('last_modified') or not new_entry.get('last_modified'):
+      return False
+    return entry['last_modified'] == new_entry['last_modified'] and entry.get('size') == new_entry.get('size')
+
+  def _store(self, ifh):
+    """
+    Copy the contents of file handle ifh to a temporary file in the cache,
+    and return a dict with the SHA-256 digest, fetch time and the
+    temporary file's name (tmpfn), which fetch() moves into place.
+    """
+    sha = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False) as ofh:
+      while True:
+        block = ifh.read(BLOCK_SIZE)
+        if not block:
+          break
+        sha.update(block)
+        ofh.write(block)
+    return {'sha256': sha.hexdigest(), 'fetched': time.strftime('%Y-%m-%d %H:%M:%S'), 'tmpfn': ofh.name}
+
+  def _install(self, digest, dest, uncompress=False):
+    """
+    Install the cached file with SHA-256 digest to dest, unless dest is
+    already the current installed copy.
+    """
+    with self._lock:
+      inst = self.manifest['installed'].get(dest)
+    if inst and inst['sha256'] == digest and os.path.exists(dest):
+      st = os.stat(dest)
+      if inst['size'] == st.st_size and inst['mtime'] == st.st_mtime:
+        return
+    os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+    if os.path.exists(dest):
+      os.remove(dest)
+    src = self._object_path(digest)
+    if uncompress:
+      self._msg(f"Uncompressing to {dest}")
+      with gzip.open(src, 'rb') as ifh, open(dest, 'wb') as ofh:
+        shutil.copyfileobj(ifh, ofh, BLOCK_SIZE)
+    else:
+      self._msg(f"         to {dest}")
+      try:
+        os.link(src, dest)
+      except OSError:
+        shutil.copyfile(src, dest)
+    st = os.stat(dest)
+    with self._locked_manifest() as manifest:
+      manifest['installed'][dest] = {'sha256': digest, 'size': st.st_size, 'mtime': st.st_mtime}
+
+  def _object_path(self, digest):
+    return os.path.join(self.cache_dir, 'objects', digest)
+
+  def _read_manifest(self):
+    if not os.path.exists(self._manifest_fn):
+      return {'urls': {}, 'installed': {}}
+    with open(self._manifest_fn) as ifh:
+      return json.load(ifh)
+
+  @contextmanager
+  def _locked_manifest(self):
+    """
+    Context manager that locks the manifest against other DownloadManagers
+    (in this or other processes), re-reads it and yields it to be changed,
+    then saves it. So changes saved by others since this one read the
+    manifest are kept.
+    """
+    with self._lock, open(self._manifest_fn + '.lock', 'w') as lfh:
+      fcntl.flock(lfh, fcntl.LOCK_EX)
+      self.manifest = self._read_manifest()
+      yield self.manifest
+      self._save_manifest()
+
+  def _save_manifest(self):
+    tmpfn = self._manifest_fn + '.tmp'
+    with open(tmpfn, 'w') as ofh:
+      json.dump(self.manifest, ofh, indent=2)
+    os.replace(tmpfn, self._manifest_fn)
+
+  def _msg(self, msg):
+    if self.logger:
+      self.logger.info(msg.strip())
+    if not self.quiet:
+      print(msg)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Load DrugCentral drug_activity data into a TDLBase MySQL DB.
+
+Activities against human targets are streamed straight from the DrugCentral
+PostgreSQL database; no intermediate file is written.
+
+Usage:
+    load-DrugCentral.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>] [--pghost=<str>] [--pgport=<int>] [--pgdbname=<str>] [--pguser=<str>] [--pgpassword=<str>]
+    load-DrugCentral.py -? | --help
+
+Options:
+  -h --dbhost DBHOST   : MySQL database host name [default: localhost]
+  -n --dbname DBNAME   : MySQL database name [default: tcrdev]
+  -l --logfile LOGF    : set log file name
+  -v --loglevel LOGL   : set logging level [default: 30]
+                         50: CRITICAL
+                         40: ERROR
+                         30: WARNING
+                         20: INFO
+                         10: DEBUG
+                          0: NOTSET
+  --pghost PGHOST      : DrugCentral PostgreSQL server host name [default: unmtid-dbs.net]
+  --pgport PGPORT      : DrugCentral PostgreSQL server port [default: 5433]
+  --pgdbname PGDBNAME  : DrugCentral database name [default: drugcentral]
+  --pguser PGUSER      : DrugCentral database user [default: drugman]
+  --pgpassword PGPASS  : DrugCentral database password [default: dosage]
+  -q --quiet           : set output verbosity to minimal level
+  -d --debug           : turn on debugging output
+  -? --help            : print this message and exit
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.1"
+
+import os,sys,time
+from docopt import docopt
+from TDLB.Adaptor import Adaptor
+import logging
+import psycopg2
+from psycopg2.extras import RealDictCursor
+import slm_util_functions as slmf
+
+PROGRAM = os.path.basename(sys.argv[0])
+LOGDIR = f"../log/TDLBase/"
+LOGFILE = f"{LOGDIR}/{PROGRAM}.log"
+DC_ACTS_SQL = """SELECT atf.accession, atf.struct_id, s.name, s.smiles, atf.moa, atf.act_value,
+                        atf.act_type, atf.action_type, atf.act_source, atf.act_source_url
+                 FROM act_table_full atf, structures s
+                 WHERE atf.struct_id = s.cd_id AND
+                       atf.organism = 'Homo sapiens'"""
+# Number of activities fetched from DrugCentral, and inserted, at a time
+BATCH_SIZE = 10000
+
+def load(args, dba, logger, logfile):
+  dsn = f"host={args['--pghost']} port={args['--pgport']} dbname={args['--pgdbname']} user={args['--pguser']} password={args['--pgpassword']}"
+  pgconn = psycopg2.connect(dsn)
+  if not args['--quiet']:
+    print(f"\nConnected to DrugCentral: {args['--pgdbname']} on {args['--pghost']}")
+  up2tid = dba.get_uniprot_map()
+  # existing rows are deleted in the same transaction as the new ones are
+  # inserted, so if loading fails they are left as they were
+  rv = dba.del_drug_activities(commit=False)
+  if rv is False:
+    print(f"ERROR deleting existing drug_activity rows. See logfile {logfile} for details.")
+    return
+  with pgconn:
+    if not args['--quiet']:
+      print("\nLoading DrugCentral activities")
+    # no total, as counting the activities would take as long as fetching
+    # them, so the meter shows rows and rows/sec
+    pm = slmf.ProgressMeter(quiet=args['--quiet'])
+    ct = 0
+    da_ct = 0
+    noacc_ct = 0
+    tmark = set()
+    notfnd = {}
+    batch = []
+    rv = 0
+    # a named (server-side) cursor, so activities are fetched BATCH_SIZE at
+    # a time and the whole result set is never held in memory
+    with pgconn.cursor(name='dc_acts', cursor_factory=RealDictCursor) as curs:
+      curs.itersize = BATCH_SIZE
+      curs.execute(DC_ACTS_SQL)
+      for d in curs:
+        ct += 1
+        pm.update()
+        if not d['accession']:
+          noacc_ct += 1
+          continue
+        # multi-component targets have accessions separated by '|'
+        for acc in filter(None, d['accession'].split('|')):
+          tid = up2tid.get(acc)
+          if not tid:
+            notfnd[acc] = notfnd.get(acc, 0) + 1
+            continue
+          tmark.add(tid)
+          init = {'target_id': tid, 'drug': d['name'], 'dcid': d['struct_id'], 'has_moa': int(d['moa'] == 1),
+                  'act_value': d['act_value'], 'act_type': d['act_type'], 'action_type': d['action_type'],
+                  'source': d['act_source'], 'reference': d['act_source_url'], 'smiles': d['smiles']}
+          batch.append(init)
+        if len(batch) >= BATCH_SIZE:
+          # all batches are inserted in the delete's transaction, committed below
+          rv = dba.ins_drug_activities(batch, commit=False)
+          if rv is False:
+            break
+          da_ct += rv
+          batch = []
+    pm.close()
+  pgconn.close()
+  if rv is not False:
+    rv = dba.ins_drug_activities(batch)
+  if rv is False:
+    print(f"ERROR inserting drug_activities. No changes were made to drug_activity. See logfile {logfile} for details.")
+    return
+  da_ct += rv
+  print(f"{ct} DrugCentral activities processed")
+  print(f"  Inserted {da_ct} new drug_activity rows for {len(tmark)} targets")
+  if noacc_ct:
+    print(f"  Skipped {noacc_ct} activities with no UniProt accession")
+  if notfnd:
+    for acc,n in sorted(notfnd.items()):
+      logger.warning(f"No target found for UniProt {acc} ({n} activities)")
+    print(f"WARNING: No target found for {len(notfnd)} UniProt accessions ({sum(notfnd.values())} activities). See logfile {logfile} for details.")
+
+
+if __name__ == '__main__':
+  print("\n{} (v{}) [{}]:".format(PROGRAM, __version__, time.strftime("%c")))
+  start_time = time.time()
+
+  args = docopt(__doc__, version=__version__)
+  if args['--debug']:
+    print(f"\n[*DEBUG*] ARGS:\n{args}\n")
+  if args['--logfile']:
+    logfile =  args['--logfile']
+  else:
+    logfile = LOGFILE
+  loglevel = int(args['--loglevel'])
+  logger = logging.getLogger(__name__)
+  logger.setLevel(loglevel)
+  if not args['--debug']:
+    logger.propagate = False # turns off console logging
+  fh = logging.FileHandler(logfile)
+  fmtr = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+  fh.setFormatter(fmtr)
+  logger.addHandler(fh)
+
+  dba_params = {'dbhost': args['--dbhost'], 'dbname': args['--dbname'], 'logger_name': __name__}
+  dba = Adaptor(dba_params)
+  dbi = dba.get_dbinfo()
+  logger.info("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+  if not args['--quiet']:
+    print("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+
+  load(args, dba, logger, logfile)
+
+  elapsed = time.time() - start_time
+  print("\n{}: Done. Elapsed time: {}\n".format(PROGRAM, slmf.secs2str(elapsed)))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Load Experimental MF/BP Leaf Term GOA tdl_infos into a TDLBase MySQL DB.
+
+For each target, these are the Molecular Function and Biological Process GO
+terms annotated with experimental evidence that are not an ancestor (via
+is_a) of another such term of the target.
+
+Usage:
+    load-GOExptFuncLeafTDLIs.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>]
+    load-GOExptFuncLeafTDLIs.py -? | --help
+
+Options:
+  -h --dbhost DBHOST   : MySQL database host name [default: localhost]
+  -n --dbname DBNAME   : MySQL database name [default: tcrdev]
+  -l --logfile LOGF    : set log file name
+  -v --loglevel LOGL   : set logging level [default: 30]
+                         50: CRITICAL
+                         40: ERROR
+                         30: WARNING
+                         20: INFO
+                         10: DEBUG
+                          0: NOTSET
+  -q --quiet           : set output verbosity to minimal level
+  -d --debug           : turn on debugging output to console
+  -? --help            : print this message and exit
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+
+import os,sys,time
+from itertools import groupby
+from operator import itemgetter
+from docopt import docopt
+from TDLB.Adaptor import Adaptor
+import logging
+from download_manager import DownloadManager
+import ontology
+import slm_util_functions as slmf
+
+PROGRAM = os.path.basename(sys.argv[0])
+LOGDIR = f"../log/TDLBase/"
+LOGFILE = f"{LOGDIR}/{PROGRAM}.log"
+GO_BASE_URL = 'http://purl.obolibrary.org/obo/'
+GO_DOWNLOAD_DIR = '../data/GO/'
+GO_OBO = 'go.obo'
+ITYPE = 'Experimental MF/BP Leaf Term GOA'
+EXP_CODES = ['EXP', 'IDA', 'IMP', 'IGI', 'IEP']
+
+def download(args, logger):
+  dlm = DownloadManager(quiet=args['--quiet'], logger=logger)
+  dlm.fetch(GO_BASE_URL + GO_OBO, GO_DOWNLOAD_DIR + GO_OBO)
+
+def load(args, dba, logger, logfile):
+  fn = GO_DOWNLOAD_DIR + GO_OBO
+  if not args['--quiet']:
+    print(f"\nReading Gene Ontology file {fn}")
+  go = ontology.load(fn)
+  if not args['--quiet']:
+    print(f"  {len(go)} GO terms")
+  if not args['--quiet']:
+    print(f"\nProcessing experimental MF/BP GO annotations")
+  target_ct = 0
+  goa_ct = 0
+  notfnd = set()
+  tdlis = []
+  goas = dba.iter_goas(evidence=EXP_CODES, aspects=['F', 'P'])
+  for tid,tgoas in groupby(goas, key=itemgetter('target_id')):
+    target_ct += 1
+    # the first annotation of each term is used in the tdl_info value
+    by_term = {}
+    for g in tgoas:
+      goa_ct += 1
+      if g['go_id'] not in go:
+        notfnd.add(g['go_id'])
+        continue
+      by_term.setdefault(g['go_id'], g)
+    if not by_term:
+      continue
+    leaves = go.leaves(by_term)
+    lfe_goa_strs = [ f"{g['go_id']}|{g['go_term']}|{g['evidence']}" for gid,g in by_term.items() if gid in leaves ]
+    tdlis.append( {'target_id': tid, 'itype': ITYPE, 'string_value': "; ".join(lfe_goa_strs)} )
+  for gid in sorted(notfnd):
+    logger.warning(f"GO term {gid} not found in {fn}")
+  # existing tdl_infos are deleted in the same transaction as the new ones
+  # are inserted, so if loading fails they are left as they were
+  rv = dba.del_tdl_infos(ITYPE, commit=False)
+  if rv is False:
+    print(f"ERROR deleting existing {ITYPE} tdl_infos. No changes were made to tdl_info. See logfile {logfile} for details.")
+    return
+  rv = dba.ins_tdl_infos(tdlis)
+  print(f"Processed {goa_ct} experimental MF/BP GOAs for {target_ct} targets.")
+  if rv is not False:
+    print(f"  Inserted {rv} new {ITYPE} tdl_infos")
+  else:
+    print(f"ERROR inserting {ITYPE} tdl_infos. No changes were made to tdl_info. See logfile {logfile} for details.")
+  if notfnd:
+    print(f"WARNING: {len(notfnd)} GO terms not found in {fn}. See logfile {logfile} for details.")
+
+
+if __name__ == '__main__':
+  print("\n{} (v{}) [{}]:".format(PROGRAM, __version__, time.strftime("%c")))
+  start_time = time.time()
+
+  args = docopt(__doc__, version=__version__)
+  if args['--debug']:
+    print(f"\n[*DEBUG*] ARGS:\nargs\n")
+  if args['--logfile']:
+    logfile =  args['--logfile']
+  else:
+    logfile = LOGFILE
+  loglevel = int(args['--loglevel'])
+  logger = logging.getLogger(__name__)
+  logger.setLevel(loglevel)
+  if not args['--debug']:
+    logger.propagate = False # turns off console logging
+  fh = logging.FileHandler(logfile)
+  fmtr = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+  fh.setFormatter(fmtr)
+  logger.addHandler(fh)
+
+  dba_params = {'dbhost': args['--dbhost'], 'dbname': args['--dbname'], 'logger_name': __name__}
+  dba = Adaptor(dba_params)
+  dbi = dba.get_dbinfo()
+  logger.info("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+  if not args['--quiet']:
+    print("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+
+  download(args, logger)
+
+  load(args, dba, logger, logfile)
+
+  elapsed = time.time() - start_time
+  print("\n{}: Done. Elapsed time: {}\n".format(PROGRAM, slmf.secs2str(elapsed)))
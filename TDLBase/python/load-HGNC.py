@@ -3,7 +3,7 @@
 """Load HGNC annotations for targets into a TDLBase MySQL DB from downloaded TSV file.
 
 Usage:
-    load-HGNC.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>]
+    load-HGNC.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>] [--bulk] [--infile=<file>] [--profile=<str>]
     load-HGNC.py -h | --help
 
 Options:
@@ -17,6 +17,12 @@ Options:
                          20: INFO
                          10: DEBUG
                           0: NOTSET
+  --bulk               : load the file into a staging table and annotate
+                         targets with a few set-based SQL statements
+  --infile TSVFILE     : HGNC TSV file to load [default: ../data/HGNC/HGNC_20250213.tsv]
+  --profile MODE       : profile the run with MODE cprofile or sampling, and
+                         print phase wall times and hotspots at exit. The
+                         profile is written to the log directory.
   -q --quiet           : set output verbosity to minimal level
   -d --debug           : turn on debugging output
   -? --help            : print this message and exit 
@@ -26,24 +32,24 @@ __email__ = "smathias@salud.unm.edu"
 __org__ = "Translational Informatics Division, UNM School of Medicine"
 __copyright__ = "Copyright 2025, Steve Mathias"
 __license__ = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
-__version__ = "1.0.0"
+__version__ = "1.3.0"
 
 import os,sys,time
 from docopt import docopt
 from TDLB.Adaptor import Adaptor
 import logging
 import csv
+import profiling
 import slm_util_functions as slmf
 
 PROGRAM = os.path.basename(sys.argv[0])
 LOGDIR = f"../log/TDLBase/"
 LOGFILE = f"{LOGDIR}/{PROGRAM}.log"
-HGNC_TSV_FILE = '../data/HGNC/HGNC_20250213.tsv'
 
 def load(args, dba, logger, logfile):
-  line_ct = slmf.wcl(HGNC_TSV_FILE)
+  fn = args['--infile']
   if not args['--quiet']:
-    print(f"\nProcessing {line_ct} lines in file {HGNC_TSV_FILE}")
+    print(f"\nProcessing file {fn}")
   ct = 0
   hgnc_ct = 0
   chr_ct = 0
@@ -54,9 +60,10 @@ def load(args, dba, logger, logfile):
   notfnd = set()
   tmark = set()
   db_err_ct = 0
-  with open(HGNC_TSV_FILE, 'r') as ifh:
+  with open(fn, 'r') as ifh:
     tsvreader = csv.reader(ifh, delimiter='\t')
-    for row in tsvreader:
+    pm = slmf.ProgressMeter(fh=ifh, quiet=args['--quiet'])
+    for row in profiling.timed(tsvreader, 'parse'):
       # 0: HGNC ID
       # 1: Approved symbol
       # 2: Approved name
@@ -69,7 +76,7 @@ def load(args, dba, logger, logfile):
         ct += 1
         continue
       ct += 1
-      slmf.update_progress(ct/line_ct)
+      pm.update()
       sym = row[1]
       if row[5] != '':
         geneid = int(row[5])
@@ -134,6 +141,7 @@ def load(args, dba, logger, logfile):
               logger.warning("GeneID discrepancy: UniProt's={}, HGNC's={}".format(target['geneid'], geneid))
               geneiddiscr_ct += 1
         tmark.add(tid)
+    pm.close()
   print("Processed {} lines - {} targets annotated.".format(ct, len(tmark)))
   if notfnd:
     print("No target found for {} lines (with UniProts).".format(len(notfnd)))
@@ -150,6 +158,55 @@ def load(args, dba, logger, logfile):
     print(f"WARNING: {db_err_ct} DB errors occurred. See logfile {logfile} for details.")
 
 
+def load_bulk(args, dba, logger, logfile):
+  """
+  The same as load(), but done with a few set-based SQL statements by
+  Adaptor.upd_targets_hgnc().
+  """
+  fn = args['--infile']
+  rows = []
+  ct = 0
+  with open(fn, 'r') as ifh, profiling.phase('parse'):
+    tsvreader = csv.reader(ifh, delimiter='\t')
+    header = next(tsvreader) # header line
+    ct += 1
+    for row in tsvreader:
+      ct += 1
+      geneid = int(row[5]) if row[5] != '' else None
+      up = row[6] if row[6] != '' else None
+      rows.append( (ct, row[0], row[1], row[4], geneid, up) )
+  if not args['--quiet']:
+    print(f"\nProcessing {ct} lines in file {fn}")
+  with profiling.phase('update'):
+    rv = dba.upd_targets_hgnc(rows)
+  if not rv:
+    print(f"ERROR: HGNC bulk load failed. See logfile {logfile} for details.")
+    return
+  for sym,geneid,up in rv['notfnd']:
+    logger.warning(f"No target found for {sym}|{geneid}|{up}")
+  for tid,up,sym in rv['new_syms']:
+    logger.info("Inserted new sym {} for target {}|{}".format(sym, tid, up))
+  for tsym,sym in rv['symdiscrs']:
+    logger.warning("Symbol discrepancy: UniProt's=%s, HGNC's=%s" % (tsym, sym))
+  for tid,up,geneid in rv['new_geneids']:
+    logger.info("Inserted new geneid {} for target {}, {}".format(geneid, tid, up))
+  for tgeneid,geneid in rv['geneiddiscrs']:
+    logger.warning("GeneID discrepancy: UniProt's={}, HGNC's={}".format(tgeneid, geneid))
+  notfnd = set(rv['notfnd'])
+  print("Processed {} lines - {} targets annotated.".format(ct, rv['target_ct']))
+  if notfnd:
+    print("No target found for {} lines (with UniProts).".format(len(notfnd)))
+  print(f"  Inserted {rv['hgnc_ct']} HGNC ID xrefs")
+  print(f"  Updated {rv['chr_ct']} target.chr values.")
+  print(f"  Inserted {rv['sym_ct']} new HGNC symbols")
+  if rv['symdiscrs']:
+    print(f"WARNING: Found {len(rv['symdiscrs'])} discrepant HGNC symbols. See logfile {logfile} for details")
+  if rv['geneid_ct'] > 0:
+    print(f"  Inserted {rv['geneid_ct']} new NCBI Gene IDs")
+  if rv['geneiddiscrs']:
+    print(f"WARNING: Found {len(rv['geneiddiscrs'])} discrepant NCBI Gene IDs. See logfile {logfile} for details")
+
+
 if __name__ == '__main__':
   print("\n{} (v{}) [{}]:\n".format(PROGRAM, __version__, time.strftime("%c")))
   start_time = time.time()
@@ -157,6 +214,8 @@ if __name__ == '__main__':
   args = docopt(__doc__, version=__version__)
   if args['--debug']:
     print(f"\n[*DEBUG*] ARGS:\nargs\n")
+  if args['--profile'] and args['--profile'] not in profiling.MODES:
+    sys.exit(f"ERROR: --profile must be one of: {', '.join(profiling.MODES)}")
   if args['--logfile']:
     logfile =  args['--logfile']
   else:
@@ -166,7 +225,7 @@ if __name__ == '__main__':
   logger.setLevel(loglevel)
   if not args['--debug']:
     logger.propagate = False # turns off console logging
-  fh = logging.FileHandler(LOGFILE)
+  fh = logging.FileHandler(logfile)
   fmtr = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
   fh.setFormatter(fmtr)
   logger.addHandler(fh)
@@ -178,7 +237,13 @@ if __name__ == '__main__':
   if not args['--quiet']:
     print("Connected to TDLBase:: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
 
-  load(args, dba, logger, logfile)
+  prof = profiling.Profiler(args['--profile'], f"{LOGDIR}/{PROGRAM}")
+  with prof.phase('load'):
+    if args['--bulk']:
+      load_bulk(args, dba, logger, logfile)
+    else:
+      load(args, dba, logger, logfile)
+  prof.report()
     
   elapsed = time.time() - start_time
   print("\n{}: Done. Elapsed time: {}\n".format(PROGRAM, slmf.secs2str(elapsed)))
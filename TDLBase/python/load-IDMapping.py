@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# Time-stamp: <2025-02-13 18:25:41 smathias>
+"""Load xrefs into a TDLBase MySQL DB from the UniProt ID Mapping file.
+
+Any number of ID Mapping columns can be loaded in a single pass over the
+file. Available columns are: RefSeq, GI, PDB, UniRef100, UniRef90, UniRef50,
+UniParc, PIR, MIM, UniGene, EMBL, EMBL-CDS, Ensembl, Ensembl_TRS and
+Ensembl_PRO.
+
+Usage:
+    load-IDMapping.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>] [--columns=<str>] [--infile=<file>] [--profile=<str>]
+    load-IDMapping.py -? | --help
+
+Options:
+  -h --dbhost DBHOST   : MySQL database host name [default: localhost]
+  -n --dbname DBNAME   : MySQL database name [default: tcrdev]
+  -l --logfile LOGF    : set log file name
+  -v --loglevel LOGL   : set logging level [default: 30]
+                         50: CRITICAL
+                         40: ERROR
+                         30: WARNING
+                         20: INFO
+                         10: DEBUG
+                          0: NOTSET
+  -c --columns COLS    : comma-separated list of ID Mapping columns to load
+                         [default: GI]
+  --infile IDMFILE     : load this ID Mapping file (which may be compressed)
+                         instead of downloading the current human file
+  --profile MODE       : profile the run with MODE cprofile or sampling, and
+                         print phase wall times and hotspots at exit. The
+                         profile is written to the log directory.
+  -q --quiet           : set output verbosity to minimal level
+  -d --debug           : turn on debugging output
+  -? --help            : print this message and exit
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "2.2.0"
+
+import os,sys,time
+from docopt import docopt
+from TDLB.Adaptor import Adaptor
+import logging
+from download_manager import DownloadManager
+import profiling
+import slm_util_functions as slmf
+
+PROGRAM = os.path.basename(sys.argv[0])
+LOGDIR = f"../log/TDLBase/"
+LOGFILE = f"{LOGDIR}/{PROGRAM}.log"
+DOWNLOAD_DIR = '../data/UniProt/'
+BASE_URL = 'ftp://ftp.uniprot.org/pub/databases/uniprot/current_release/knowledgebase/idmapping/by_organism/'
+FILENAME = 'HUMAN_9606_idmapping_selected.tab.gz'
+# ID Mapping fields
+# 1. UniProtKB-AC
+# 2. UniProtKB-ID
+# 3. GeneID (EntrezGene)
+# 4. RefSeq
+# 5. GI
+# 6. PDB
+# 7. GO
+# 8. UniRef100
+# 9. UniRef90
+# 10. UniRef50
+# 11. UniParc
+# 12. PIR
+# 13. NCBI-taxon
+# 14. MIM
+# 15. UniGene
+# 16. PubMed
+# 17. EMBL
+# 18. EMBL-CDS
+# 19. Ensembl
+# 20. Ensembl_TRS
+# 21. Ensembl_PRO
+# 22. Additional PubMed
+# Loadable columns: name => (0-based column index, xref.xtype)
+COLUMNS = {'RefSeq': (3, 'RefSeq'),
+           'GI': (4, 'NCBI GI'),
+           'PDB': (5, 'PDB'),
+           'UniRef100': (7, 'UniRef100'),
+           'UniRef90': (8, 'UniRef90'),
+           'UniRef50': (9, 'UniRef50'),
+           'UniParc': (10, 'UniParc'),
+           'PIR': (11, 'PIR'),
+           'MIM': (13, 'MIM'),
+           'UniGene': (14, 'UniGene'),
+           'EMBL': (16, 'EMBL'),
+           'EMBL-CDS': (17, 'EMBL-CDS'),
+           'Ensembl': (18, 'Ensembl'),
+           'Ensembl_TRS': (19, 'Ensembl'),
+           'Ensembl_PRO': (20, 'Ensembl')}
+# Number of xrefs of one type to collect before inserting them
+BATCH_SIZE = 10000
+
+def download(args, logger):
+  """
+  Download the ID Mapping file, unless it has not changed upstream since the
+  last run, or another file was given with --infile.
+  """
+  if args['--infile']:
+    return
+  dlm = DownloadManager(quiet=args['--quiet'], logger=logger)
+  dlm.fetch(BASE_URL + FILENAME, DOWNLOAD_DIR + FILENAME)
+
+def load(args, dba, logger, logfile):
+  fn = args['--infile'] or DOWNLOAD_DIR + FILENAME
+  cols = args['--columns'].split(',')
+  for col in cols:
+    if col not in COLUMNS:
+      print(f"ERROR: Unknown ID Mapping column {col}. Available columns are: {', '.join(COLUMNS)}")
+      return
+  up2tid = dba.get_uniprot_map()
+  if not args['--quiet']:
+    print(f"\nProcessing file {fn} for columns: {', '.join(cols)}")
+  ct = 0
+  skip_ct = 0
+  xref_cts = {col: 0 for col in cols}
+  tmarks = {col: set() for col in cols}
+  batches = {col: [] for col in cols}
+  dba_err_ct = 0
+  with slmf.open_stream(fn, 'rt') as tsv:
+    pm = slmf.ProgressMeter(fh=tsv, quiet=args['--quiet'])
+    for line in profiling.timed(tsv, 'read'):
+      ct += 1
+      pm.update()
+      data = line.rstrip('\n').split('\t')
+      tid = up2tid.get(data[0])
+      if not tid:
+        skip_ct += 1
+        continue
+      for col in cols:
+        idx, xtype = COLUMNS[col]
+        if not data[idx]:
+          continue
+        batch = batches[col]
+        for val in data[idx].split('; '):
+          batch.append( {'target_id': tid, 'xtype': xtype, 'value': val} )
+        tmarks[col].add(tid)
+        if len(batch) >= BATCH_SIZE:
+          with profiling.phase('insert'):
+            rv = dba.ins_xrefs(batch)
+          if rv is False:
+            dba_err_ct += 1
+          else:
+            xref_cts[col] += rv
+          batch.clear()
+    pm.close()
+  for col,batch in batches.items():
+    if batch:
+      with profiling.phase('insert'):
+        rv = dba.ins_xrefs(batch)
+      if rv is False:
+        dba_err_ct += 1
+      else:
+        xref_cts[col] += rv
+  print(f"\n{ct} rows processed")
+  for col in cols:
+    print(f"  Inserted {xref_cts[col]} new {col} xref rows for {len(tmarks[col])} targets")
+  print(f"  Skipped {skip_ct} rows with no target")
+  if dba_err_ct > 0:
+    print(f"WARNING: {dba_err_ct} database errors occured. See logfile {logfile} for details.")
+
+
+if __name__ == '__main__':
+  print("\n{} (v{}) [{}]:".format(PROGRAM, __version__, time.strftime("%c")))
+  start_time = time.time()
+
+  args = docopt(__doc__, version=__version__)
+  if args['--debug']:
+    print(f"\n[*DEBUG*] ARGS:\n{args}\n")
+  if args['--profile'] and args['--profile'] not in profiling.MODES:
+    sys.exit(f"ERROR: --profile must be one of: {', '.join(profiling.MODES)}")
+  if args['--logfile']:
+    logfile =  args['--logfile']
+  else:
+    logfile = LOGFILE
+  loglevel = int(args['--loglevel'])
+  logger = logging.getLogger(__name__)
+  logger.setLevel(loglevel)
+  if not args['--debug']:
+    logger.propagate = False # turns off console logging
+  fh = logging.FileHandler(logfile)
+  fmtr = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+  fh.setFormatter(fmtr)
+  logger.addHandler(fh)
+
+  dba_params = {'dbhost': args['--dbhost'], 'dbname': args['--dbname'], 'logger_name': __name__}
+  dba = Adaptor(dba_params)
+  dbi = dba.get_dbinfo()
+  logger.info("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+  if not args['--quiet']:
+    print("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
+
+  prof = profiling.Profiler(args['--profile'], f"{LOGDIR}/{PROGRAM}")
+  with prof.phase('download'):
+    download(args, logger)
+  with prof.phase('load (read + insert)'):
+    load(args, dba, logger, logfile)
+  prof.report()
+
+  elapsed = time.time() - start_time
+  print("\n{}: Done. Elapsed time: {}\n".format(PROGRAM, slmf.secs2str(elapsed)))
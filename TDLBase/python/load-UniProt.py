@@ -3,7 +3,7 @@
 """Load human reviewed protein data from UniProt.org into a TDLBase MySQL DB.
 
 Usage:
-    load-UniProt.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>]
+    load-UniProt.py [--debug | --quiet] [--dbhost=<str>] [--dbname=<str>] [--logfile=<file>] [--loglevel=<int>] [--procs=<int>] [--accessions=<str>] [--checkpoint=<int>] [--resume] [--tinit-cache] [--pipeline] [--queue-size=<int>] [--upfile=<file>] [--ecofile=<file>] [--profile=<str>]
     load-UniProt.py -? | --help
 
 Options:
@@ -17,6 +17,25 @@ Options:
                          20: INFO
                          10: DEBUG
                           0: NOTSET
+  --procs NPROCS       : number of processes to use to parse UniProt XML [default: 1]
+  --accessions ACCS    : comma-separated list of UniProt accessions to load
+                         (default is to load all entries)
+  --checkpoint NCKPT   : record load progress every NCKPT targets [default: 1000]
+  --resume             : resume an interrupted load after the last recorded
+                         target
+  --tinit-cache        : read parsed UniProt entries from a cache for the
+                         current UniProt and ECO files, or write it if there
+                         is none
+  --pipeline           : parse entries in a background thread while loading
+  --queue-size QSIZE   : maximum number of parsed entries waiting to be loaded
+                         in pipeline mode [default: 1000]
+  --upfile UPFILE      : load this (uncompressed) UniProt XML file instead of
+                         downloading the current human file
+  --ecofile ECOFILE    : use this Evidence Ontology file instead of
+                         downloading the current one
+  --profile MODE       : profile the run with MODE cprofile or sampling, and
+                         print phase wall times and hotspots at exit. The
+                         profile is written to the log directory.
   -q --quiet           : set output verbosity to minimal level
   -d --debug           : turn on debugging output to console
   -? --help            : print this message and exit 
@@ -26,15 +45,18 @@ __email__     = "smathias @salud.unm.edu"
 __org__       = "Translational Informatics Division, UNM School of Medicine"
 __copyright__ = "Copyright 2025, Steve Mathias"
 __license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
-__version__   = "1.0.0"
+__version__   = "1.3.1"
 
-import os,sys,time,re
+import os,sys,time,re,json,hashlib,pickle,shutil
+from itertools import islice
 from docopt import docopt
 from TDLB.Adaptor import Adaptor
 import logging
-from urllib.request import urlretrieve
-import gzip
-import obo
+import multiprocessing
+from download_manager import DownloadManager
+import ontology
+import profiling
+import uniprot_xml
 from lxml import etree, objectify
 import slm_util_functions as slmf
 import warnings
@@ -50,29 +72,51 @@ NS = '{https://uniprot.org/uniprot}'
 ECO_BASE_URL = 'https://raw.githubusercontent.com/evidenceontology/evidenceontology/master/'
 ECO_DOWNLOAD_DIR = '../data/EvidenceOntology/'
 ECO_OBO = 'eco.obo'
+ECO_MAP_CACHE = ECO_DOWNLOAD_DIR + 'eco_map.json'
+CHECKPOINT_FILE = UP_DOWNLOAD_DIR + 'load-UniProt_{dbhost}_{dbport}_{dbname}.checkpoint'
+TINIT_CACHE_DIR = UP_DOWNLOAD_DIR + 'tinit_cache/'
+TINIT_SHARD_SIZE = 5000
+# Number of XML slices handed to each parser process. More slices than
+# processes keeps all processes busy when some slices parse slower.
+SLICES_PER_PROC = 4
 
-def download_eco(args):
-  if os.path.exists(ECO_DOWNLOAD_DIR + ECO_OBO):
-    os.remove(ECO_DOWNLOAD_DIR + ECO_OBO)
-  if not args['--quiet']:
-      print("\nDownloading {}".format(ECO_BASE_URL + ECO_OBO))
-      print("         to {}".format(ECO_DOWNLOAD_DIR + ECO_OBO))
-  urlretrieve(ECO_BASE_URL + ECO_OBO, ECO_DOWNLOAD_DIR + ECO_OBO)
+def download(args, logger):
+  """
+  Download the ECO and UniProt files concurrently. Files that have not
+  changed upstream since the last run are not downloaded again.
+  """
+  fetches = []
+  if not args['--ecofile']:
+    fetches.append( (ECO_BASE_URL + ECO_OBO, ECO_DOWNLOAD_DIR + ECO_OBO, False) )
+  if not args['--upfile']:
+    fetches.append( (UP_BASE_URL + UP_HUMAN_FILE, UP_DOWNLOAD_DIR + UP_HUMAN_FILE, True) )
+  if fetches:
+    dlm = DownloadManager(quiet=args['--quiet'], logger=logger)
+    dlm.fetch_all(fetches)
 
 def mk_eco_map(args):
   """
-  Return a mapping of Evidence Ontology ECO IDs to Go Evidence Codes.
+  Return a mapping of Evidence Ontology ECO IDs to Go Evidence Codes. Only
+  some ECO terms have a GOECO xref, so other terms are mapped to the GO
+  evidence code of their nearest mapped is_a ancestor.
+  The mapping is cached in ECO_MAP_CACHE, and only rebuilt when the ECO
+  file (or the code that builds it) has changed.
   """
-  fn = ECO_DOWNLOAD_DIR + ECO_OBO
+  fn = args['--ecofile'] or ECO_DOWNLOAD_DIR + ECO_OBO
+  key = f"{ontology.cache_key(fn)}_v{__version__}"
+  if os.path.exists(ECO_MAP_CACHE):
+    with open(ECO_MAP_CACHE) as ifh:
+      cache = json.load(ifh)
+    if cache['key'] == key:
+      if not args['--quiet']:
+        print(f"\nUsing cached ECO map {ECO_MAP_CACHE}")
+      return cache['eco_map']
   if not args['--quiet']:
     print(f"\nParsing Evidence Ontology file {fn}")
-  eco = {}
+  eco = ontology.load(fn)
   eco_map = {}
-  parser = obo.Parser(fn)
-  for stanza in parser:
-    eco[stanza.tags['id'][0].value] = stanza.tags
   regex = re.compile(r'GOECO:([A-Z]{2,3})')
-  for e,d in eco.items():
+  for e,d in zip(eco.ids, eco.terms):
     if not e.startswith('ECO:'):
       continue
     if 'xref' in d:
@@ -80,163 +124,425 @@ def mk_eco_map(args):
         m = regex.match(x.value)
         if m:
           eco_map[e] = m.group(1)
+  eco_map = eco.nearest_mapped(eco_map)
+  os.makedirs(os.path.dirname(ECO_MAP_CACHE), exist_ok=True)
+  tmpfn = ECO_MAP_CACHE + '.tmp'
+  with open(tmpfn, 'w') as ofh:
+    json.dump({'key': key, 'eco_map': eco_map}, ofh)
+  os.replace(tmpfn, ECO_MAP_CACHE)
   return eco_map
 
-def download_uniprot(args):
-    gzfn = UP_HUMAN_FILE
-    gzfp = UP_DOWNLOAD_DIR + gzfn
-    fp = gzfp.replace('.gz', '')
-    if os.path.exists(gzfp):
-      os.remove(gzfp)
-    if os.path.exists(fp):
-      os.remove(fp)
-    if not args['--quiet']:
-      print("\nDownloading {}".format(UP_BASE_URL + gzfn))
-      print(f"         to {gzfn}")
-    urlretrieve(UP_BASE_URL + gzfn, gzfp)
-    if not args['--quiet']:
-      print(f"Uncompressing {gzfp}")
-    ifh = gzip.open(gzfp, 'rb')
-    ofh = open(fp, 'wb')
-    ofh.write( ifh.read() )
-    ifh.close()
-    ofh.close()
-  
 def load_targets(args, dba, eco_map, logger, logfile):
-  fn = UP_DOWNLOAD_DIR + UP_HUMAN_FILE.replace('.gz', '')
+  fn = args['--upfile'] or UP_DOWNLOAD_DIR + UP_HUMAN_FILE.replace('.gz', '')
   if not args['--quiet']:
     print(f"\nParsing file {fn}")
-  root = objectify.parse(fn).getroot()
-  up_ct = len(root.entry)
+  start = 0
+  if args['--resume'] and not args['--accessions']:
+    ckpt = read_checkpoint(fn, checkpoint_db(args))
+    if ckpt:
+      start = ckpt['index'] + 1
+      if not args['--quiet']:
+        print(f"Resuming after entry {start} ({ckpt['accession']})")
+      logger.info(f"Resuming after entry {start} ({ckpt['accession']})")
+  with profiling.phase('parse'):
+    up_ct, tinits = read_tinits(args, fn, eco_map, logger, start)
+  # entries are converted (and, in parallel mode, parsed) as they are read
+  tinits = profiling.timed(tinits, 'parse')
   if not args['--quiet']:
-    print(f"Loading data for {up_ct} UniProt records")
-  logger.info(f"Loading data for {up_ct} UniProt records in file {fn}")
-  ct = 0
+    print(f"Loading data for {up_ct - start} UniProt records")
+  logger.info(f"Loading data for {up_ct - start} UniProt records in file {fn}")
+  # Checkpoints record positions in the whole file, so are not used when
+  # loading a subset of entries.
+  ckpt_every = 0 if args['--accessions'] else int(args['--checkpoint'])
+  # Targets loaded after the last checkpoint of an interrupted load are in
+  # the DB already, so check for them until the first one that is not.
+  check_loaded = start > 0
+  if args['--pipeline']:
+    # Parse in a background thread, so that parsing overlaps DB round trips
+    pstats = {}
+    batches = slmf.prefetch(tinits, maxsize=int(args['--queue-size']), stats=pstats)
+    tinits = (rec for batch in batches for rec in batch)
+  ct = start
+  pm = slmf.ProgressMeter(total=up_ct, initial=start, quiet=args['--quiet'])
   load_ct = 0
+  skip_ct = 0
   xml_err_ct = 0
   dba_err_ct = 0
-  for i in range(len(root.entry)):
+  for acc,tinit in tinits:
     ct += 1
-    slmf.update_progress(ct/up_ct)
-    entry = root.entry[i]
-    logger.info("Processing entry {}".format(entry.accession))
-    tinit = entry2tinit(entry, eco_map)
+    pm.update()
+    logger.info("Processing entry {}".format(acc))
     if not tinit:
       xml_err_ct += 1
-      logger.error("XML Error for {}".format(entry.accession))
+      logger.error("XML Error for {}".format(acc))
       continue
-    tid = dba.ins_target(tinit)
+    if check_loaded:
+      if dba.find_target_ids({'uniprot': tinit['uniprot']}):
+        logger.info(f"Target for {acc} already loaded")
+        skip_ct += 1
+        continue
+      check_loaded = False
+    with profiling.phase('insert'):
+      tid = dba.ins_target(tinit)
     if not tid:
       dba_err_ct += 1
       continue
     logger.debug(f"Target insert id: {tid}")
     load_ct += 1
+    if ckpt_every and load_ct % ckpt_every == 0:
+      write_checkpoint(fn, checkpoint_db(args), ct - 1, acc)
+  pm.close()
+  ckfn = CHECKPOINT_FILE.format(**checkpoint_db(args))
+  if ckpt_every and os.path.exists(ckfn):
+    os.remove(ckfn)
   print(f"Processed {ct} UniProt records.")
   print(f"  Loaded {load_ct} targets")
+  if skip_ct > 0:
+    print(f"  Skipped {skip_ct} targets loaded before resuming")
   if xml_err_ct > 0:
     print(f"WARNING: {xml_err_ct} XML parsing errors occurred. See logfile {logfile} for details.")
   if dba_err_ct > 0:
     print(f"WARNING: {dba_err_ct} DB errors occurred. See logfile {logfile} for details.")
+  if args['--pipeline']:
+    msg = "Pipeline: parse busy {}, idle {}; load busy {}, idle {}".format(slmf.secs2str(pstats['producer_busy']), slmf.secs2str(pstats['producer_idle']), slmf.secs2str(pstats['consumer_busy']), slmf.secs2str(pstats['consumer_idle']))
+    print(msg)
+    logger.info(msg)
+
+def checkpoint_db(args):
+  """
+  Return a dict identifying the database a load writes to: the host and
+  port of its server as well as its name, so loads of same-named databases
+  on different servers (eg. dev and prod) have separate checkpoints.
+  """
+  return {'dbhost': args['--dbhost'], 'dbport': Adaptor._DBPort, 'dbname': args['--dbname']}
+
+def read_checkpoint(fn, db):
+  """
+  Return the last checkpoint recorded by load_targets() for a load of
+  UniProt file fn into database db (see checkpoint_db()), or None if there
+  is none.
+  """
+  ckfn = CHECKPOINT_FILE.format(**db)
+  if not os.path.exists(ckfn):
+    return None
+  with open(ckfn) as ifh:
+    ckpt = json.load(ifh)
+  st = os.stat(fn)
+  if ckpt['file'] != fn or ckpt['size'] != st.st_size or ckpt['mtime'] != st.st_mtime:
+    sys.exit(f"ERROR: Checkpoint file {ckfn} is for a different UniProt file. Remove it to load from the start.")
+  if any(ckpt.get(k) != v for k,v in db.items()):
+    sys.exit(f"ERROR: Checkpoint file {ckfn} is for a different database server. Remove it to load from the start.")
+  return ckpt
+
+def write_checkpoint(fn, db, index, acc):
+  """
+  Record that entries up to and including the one at index (accession acc)
+  in UniProt file fn have been committed to database db. The file is
+  replaced atomically, so an interrupted load always leaves a valid
+  checkpoint.
+  """
+  ckfn = CHECKPOINT_FILE.format(**db)
+  st = os.stat(fn)
+  ckpt = {'file': fn, 'size': st.st_size, 'mtime': st.st_mtime, 'index': index, 'accession': acc}
+  ckpt.update(db)
+  os.makedirs(os.path.dirname(ckfn), exist_ok=True)
+  with open(ckfn + '.tmp', 'w') as ofh:
+    json.dump(ckpt, ofh)
+  os.replace(ckfn + '.tmp', ckfn)
 
-def get_entry_by_accession(root, acc):
+def read_tinits(args, fn, eco_map, logger, start=0):
+  """
+  Return the number of UniProt entries in file fn and an iterator of
+  (accession, tinit) tuples for the entries from index start on. Skipped
+  entries are not converted (or, in parallel mode, not parsed at all).
+  """
+  procs = int(args['--procs'])
+  if args['--accessions']:
+    idx = uniprot_xml.EntryIndex(fn)
+    accs = []
+    for acc in args['--accessions'].split(','):
+      if acc in idx:
+        accs.append(acc)
+      else:
+        logger.warning(f"No entry for accession {acc} in file {fn}")
+        if not args['--quiet']:
+          print(f"WARNING: No entry for accession {acc}")
+    tinits = ( (acc, entry2tinit(idx.get_entry(acc), eco_map)) for acc in accs )
+    return len(accs), tinits
+  cdir = None
+  if args['--tinit-cache']:
+    cdir = tinit_cache_dir(fn, eco_map)
+    if os.path.exists(cdir):
+      if not args['--quiet']:
+        print(f"Reading parsed entries from cache {cdir}")
+      logger.info(f"Reading parsed entries from cache {cdir}")
+      return read_tinit_cache(cdir, start)
+  if procs > 1:
+    spans = uniprot_xml.scan_entries(fn)
+    up_ct = len(spans)
+    tinits = parse_parallel(fn, spans[start:], eco_map, procs)
+  else:
+    root = objectify.parse(fn).getroot()
+    up_ct = len(root.entry)
+    tinits = ( (str(entry.accession), entry2tinit(entry, eco_map)) for entry in islice(root.entry, start, None) )
+  if cdir and start == 0:
+    if not args['--quiet']:
+      print(f"Writing parsed entries to cache {cdir}")
+    logger.info(f"Writing parsed entries to cache {cdir}")
+    tinits = write_tinit_cache(cdir, up_ct, tinits)
+  return up_ct, tinits
+
+def tinit_cache_dir(fn, eco_map):
+  """
+  Return the tinit cache directory for the UniProt file fn and the given
+  ECO map. The key also includes this program's version, which must be
+  bumped whenever entry2tinit() output changes.
+  The file is identified by the digest of its download if it is installed
+  by the download manager and unchanged since, and otherwise (eg. a file
+  given with --upfile) by the digest of its contents.
+  """
+  dlm = DownloadManager(quiet=True)
+  up_digest = dlm.get_installed_digest(fn)
+  if not up_digest:
+    up_digest = slmf.sha256sum(fn)
+  eco_digest = hashlib.sha256(json.dumps(eco_map, sort_keys=True).encode()).hexdigest()
+  return TINIT_CACHE_DIR + f"{up_digest[:16]}_{eco_digest[:16]}_v{__version__}/"
+
+def read_tinit_cache(cdir, start=0):
+  """
+  Return the number of cached entries and an iterator of the cached
+  (accession, tinit) tuples from index start on.
+  """
+  with open(cdir + 'meta.json') as ifh:
+    meta = json.load(ifh)
+  def _read():
+    for i in range(start // TINIT_SHARD_SIZE, meta['shards']):
+      with open(cdir + f"part-{i:05d}.pickle", 'rb') as ifh:
+        skip = start - i * TINIT_SHARD_SIZE
+        while True:
+          try:
+            rec = pickle.load(ifh)
+          except EOFError:
+            break
+          if skip > 0:
+            skip -= 1
+            continue
+          yield rec
+  return meta['entries'], _read()
+
+def write_tinit_cache(cdir, up_ct, tinits):
+  """
+  Pass (accession, tinit) tuples through, writing them to shards of
+  TINIT_SHARD_SIZE pickled records as they go by. The cache is written to a
+  temporary directory that only replaces cdir once all up_ct entries have
+  been written, so an interrupted load leaves no partial cache behind.
+  """
+  tmpdir = cdir.rstrip('/') + '.tmp/'
+  if os.path.exists(tmpdir):
+    shutil.rmtree(tmpdir)
+  os.makedirs(tmpdir)
+  ct = 0
+  ofh = None
+  for rec in tinits:
+    if ct % TINIT_SHARD_SIZE == 0:
+      if ofh:
+        ofh.close()
+      ofh = open(tmpdir + f"part-{ct // TINIT_SHARD_SIZE:05d}.pickle", 'wb')
+    # records are pickled before they are yielded, because ins_target()
+    # adds target_ids to them
+    pickle.dump(rec, ofh, protocol=pickle.HIGHEST_PROTOCOL)
+    ct += 1
+    yield rec
+  if ofh:
+    ofh.close()
+  if ct == up_ct:
+    with open(tmpdir + 'meta.json', 'w') as ofh:
+      json.dump({'entries': ct, 'shards': -(-ct // TINIT_SHARD_SIZE)}, ofh)
+    os.replace(tmpdir.rstrip('/'), cdir.rstrip('/'))
+
+def parse_parallel(fn, spans, eco_map, procs):
+  """
+  Parse the UniProt XML file fn with a pool of procs processes, each of
+  which converts a contiguous slice of entries. Yields (accession, tinit)
+  tuples in file order, ie. the same order as a single process parse.
+  """
+  slices = uniprot_xml.partition(spans, procs * SLICES_PER_PROC)
+  with multiprocessing.Pool(procs, initializer=init_parse_worker, initargs=(fn, eco_map)) as pool:
+    for recs in pool.imap(parse_slice, slices):
+      yield from recs
+
+# Parser process state, set once per process by init_parse_worker()
+_worker_fn = None
+_worker_root_tag = None
+_worker_eco_map = None
+
+def init_parse_worker(fn, eco_map):
+  global _worker_fn, _worker_root_tag, _worker_eco_map
+  _worker_fn = fn
+  _worker_root_tag = uniprot_xml.get_root_tag(fn)
+  _worker_eco_map = eco_map
+
+def parse_slice(slc):
+  """
+  Parser process task: convert the entries in an (offset, length, count)
+  slice of the UniProt XML file to a list of (accession, tinit) tuples.
+  """
+  offset, length, _ = slc
+  entries = uniprot_xml.parse_slice(_worker_fn, offset, length, _worker_root_tag)
+  return [ (str(entry.accession), entry2tinit(entry, _worker_eco_map)) for entry in entries ]
+
+def get_entry_by_accession(acc, fn=UP_DOWNLOAD_DIR + UP_HUMAN_FILE.replace('.gz', '')):
   """
   This is for testing/debugging purposes (E.g. IPython)
+  The accession index file is built on first use for each UniProt release.
   """
-  for i in range(len(root.entry)):
-    entry = root.entry[i]
-    if entry.accession == acc:
-      return entry
-  return None
+  idx = uniprot_xml.EntryIndex(fn)
+  entry = idx.get_entry(acc)
+  idx.close()
+  return entry
                                               
+# Compiled XPath projections of the parts of an entry used by entry2tinit()
+def _xpath(path):
+  return etree.XPath(path, namespaces={'up': NS[1:-1]}, smart_strings=False)
+XP_ACCESSIONS = _xpath('up:accession/text()')
+XP_NAME = _xpath('up:name/text()')
+XP_RECNAME = _xpath('up:protein/up:recommendedName')
+XP_GENE_NAMES = _xpath('up:gene[1]/up:name')
+XP_COMMENTS = _xpath('up:comment')
+XP_DBREFS = _xpath('up:dbReference')
+XP_KEYWORDS = _xpath('up:keyword')
+XP_SEQUENCE = _xpath('up:sequence')
+T_FULLNAME = NS + 'fullName'
+T_SHORTNAME = NS + 'shortName'
+T_PROPERTY = NS + 'property'
+
 def entry2tinit(entry, e2e):
   """
-  Convert an entry element of type lxml.objectify.ObjectifiedElement parsed from a UniProt XML entry and return a dictionary suitable for passing to TDLB.Adaptor.ins_target().
+  Convert an entry element of type lxml.objectify.ObjectifiedElement (or lxml.etree._Element) parsed from a UniProt XML entry and return a dictionary suitable for passing to TDLB.Adaptor.ins_target(). Returns None if the entry lacks a required element.
+  The parts of the entry that are used are selected with the compiled XPath expressions above, and dbReferences are converted by the handler for their type in DBREF_HANDLERS.
   """
-  target = {'name': entry.name.text, 'description': entry.protein.recommendedName.fullName.text, 'uniprot': entry.accession.text}
+  accs = XP_ACCESSIONS(entry)
+  names = XP_NAME(entry)
+  recnames = XP_RECNAME(entry)
+  seqs = XP_SEQUENCE(entry)
+  if not accs or not names or not recnames or not seqs:
+    return None
+  fullname = recnames[0].find(T_FULLNAME)
+  if fullname is None:
+    return None
+  target = {'name': names[0], 'description': fullname.text, 'uniprot': accs[0]}
   target['sym'] = None
   aliases = []
-  if entry.find(NS+'gene'):
-    if entry.gene.find(NS+'name'):
-      for gn in entry.gene.name: # returns all gene.names
-        if gn.get('type') == 'primary':
-          target['sym'] = gn.text
-        elif gn.get('type') == 'synonym':
-          # HGNC symbol alias
-          aliases.append( {'atype': 'symbol', 'value': gn.text} )
-  target['seq'] = str(entry.sequence).replace('\n', '')
-  target['up_version'] = entry.sequence.get('version')
-  for acc in entry.accession: # returns all accessions
-    if str(acc) != target['uniprot']:
-      aliases.append( {'atype': 'uniprot', 'value': str(acc)} )
-  if entry.protein.recommendedName.find(NS+'shortName') != None:
-    sn = entry.protein.recommendedName.shortName.text
-    aliases.append( {'atype': 'uniprot', 'value': sn} )
+  # Only names from the first gene element are used, and only if the first
+  # of them is not empty
+  gene_names = XP_GENE_NAMES(entry)
+  if gene_names and gene_names[0].text:
+    for gn in gene_names:
+      gntype = gn.get('type')
+      if gntype == 'primary':
+        target['sym'] = gn.text
+      elif gntype == 'synonym':
+        # HGNC symbol alias
+        aliases.append( {'atype': 'symbol', 'value': gn.text} )
+  target['seq'] = (seqs[0].text or '').replace('\n', '')
+  target['up_version'] = seqs[0].get('version')
+  for acc in accs:
+    if acc != target['uniprot']:
+      aliases.append( {'atype': 'uniprot', 'value': acc} )
+  sn = recnames[0].find(T_SHORTNAME)
+  if sn is not None:
+    aliases.append( {'atype': 'uniprot', 'value': sn.text} )
   target['aliases'] = aliases
   # Function and Family TDL Infos (from comments)
   tdl_infos = []
-  if entry.find(NS+'comment'):
-    for c in entry.comment:
-      if c.get('type') == 'function':
-        tdl_infos.append( {'itype': 'UniProt Function',  'string_value': str(c.getchildren()[0])} )
-      if c.get('type') == 'similarity':
-        tdl_infos.append( {'itype': 'UniProt Family',  'string_value': str(c.getchildren()[0])} )
+  comments = XP_COMMENTS(entry)
+  if comments and next(comments[0].iterchildren(), None) is not None:
+    for c in comments:
+      ctype = c.get('type')
+      if ctype == 'function' or ctype == 'similarity':
+        txt = next(c.iterchildren(), None)
+        if txt is None:
+          continue
+        itype = 'UniProt Function' if ctype == 'function' else 'UniProt Family'
+        tdl_infos.append( {'itype': itype,  'string_value': txt.text or ''} )
   target['tdl_infos'] = tdl_infos
   # GeneID, XRefs, GOAs from dbReferences
   xrefs = []
   goas = []
-  for dbr in entry.dbReference:
-    if dbr.attrib['type'] == 'GeneID':
-      # Some UniProt records have multiple Gene IDs
-      # So, only take the first one and fix manually after loading
-      if 'geneid' not in target:
-        target['geneid'] = str(dbr.attrib['id'])
-    elif dbr.attrib['type'] in ['InterPro', 'Pfam', 'PROSITE', 'SMART']:
-      xtra = None
-      for el in dbr.findall(NS+'property'):
-        if el.attrib['type'] == 'entry name':
-          xtra = str(el.attrib['value'])
-        xrefs.append( {'xtype': str(dbr.attrib['type']),
-                       'value': str(dbr.attrib['id']), 'xtra': xtra} )
-    elif dbr.attrib['type'] == 'GO':
-      name = None
-      goeco = None
-      assigned_by = None
-      for el in dbr.findall(NS+'property'):
-        if el.attrib['type'] == 'term':
-          name = str(el.attrib['value'])
-        elif el.attrib['type'] == 'evidence':
-          goeco = str(el.attrib['value'])
-        elif el.attrib['type'] == 'project':
-          assigned_by = str(el.attrib['value'])
-        if goeco in e2e:
-          goas.append( {'go_id': str(dbr.attrib['id']), 'go_term': name,
-                        'goeco': goeco, 'evidence': e2e[goeco],
-                        'assigned_by': assigned_by} )
-    elif dbr.attrib['type'] == 'Ensembl':
-      xrefs.append( {'xtype': 'Ensembl', 'value': str(dbr.attrib['id'])} )
-      for el in dbr.findall(NS+'property'):
-        if el.attrib['type'] == 'protein sequence ID':
-          xrefs.append( {'xtype': 'Ensembl', 'value': str(el.attrib['value'])} )
-        elif el.attrib['type'] == 'gene ID':
-          xrefs.append( {'xtype': 'Ensembl', 'value': str(el.attrib['value'])} )
-    elif dbr.attrib['type'] == 'STRING':
-      xrefs.append( {'xtype': 'STRING', 'value': str(dbr.attrib['id'])} )
-    elif dbr.attrib['type'] == 'DrugBank':
-      xtra = None
-      for el in dbr.findall(NS+'property'):
-        if el.attrib['type'] == 'generic name':
-          xtra = str(el.attrib['value'])
-      xrefs.append( {'xtype': 'DrugBank', 'value': str(dbr.attrib['id']),
-                     'xtra': xtra} )
-    elif dbr.attrib['type'] in ['BRENDA', 'ChEMBL', 'MIM', 'PANTHER', 'PDB', 'RefSeq', 'UniGene']:
-        xrefs.append( {'xtype': str(dbr.attrib['type']), 'value': str(dbr.attrib['id'])} )
+  for dbr in XP_DBREFS(entry):
+    handler = DBREF_HANDLERS.get(dbr.get('type'))
+    if handler:
+      handler(dbr, target, xrefs, goas, e2e)
   target['goas'] = goas
   # Keywords
-  for kw in entry.keyword:
-    xrefs.append( {'xtype': 'UniProt Keyword', 'value': str(kw.attrib['id']),
-                   'xtra': str(kw)} )
+  for kw in XP_KEYWORDS(entry):
+    xrefs.append( {'xtype': 'UniProt Keyword', 'value': kw.get('id'),
+                   'xtra': kw.text} )
   target['xrefs'] = xrefs
   return target
+
+#
+# dbReference handlers for entry2tinit(). Each is called with a dbReference
+# element, the target dict and the xrefs and goas lists being built.
+#
+def dbr_geneid(dbr, target, xrefs, goas, e2e):
+  # Some UniProt records have multiple Gene IDs
+  # So, only take the first one and fix manually after loading
+  if 'geneid' not in target:
+    target['geneid'] = dbr.get('id')
+
+def dbr_domain(dbr, target, xrefs, goas, e2e):
+  xtype = dbr.get('type')
+  value = dbr.get('id')
+  xtra = None
+  for el in dbr.iterchildren(T_PROPERTY):
+    if el.get('type') == 'entry name':
+      xtra = el.get('value')
+    # one xref per property, as always; repeats are rejected by the DB
+    xrefs.append( {'xtype': xtype, 'value': value, 'xtra': xtra} )
+
+def dbr_go(dbr, target, xrefs, goas, e2e):
+  go_id = dbr.get('id')
+  name = None
+  goeco = None
+  assigned_by = None
+  for el in dbr.iterchildren(T_PROPERTY):
+    ptype = el.get('type')
+    if ptype == 'term':
+      name = el.get('value')
+    elif ptype == 'evidence':
+      goeco = el.get('value')
+    elif ptype == 'project':
+      assigned_by = el.get('value')
+    if goeco in e2e:
+      goas.append( {'go_id': go_id, 'go_term': name,
+                    'goeco': goeco, 'evidence': e2e[goeco],
+                    'assigned_by': assigned_by} )
+
+def dbr_ensembl(dbr, target, xrefs, goas, e2e):
+  xrefs.append( {'xtype': 'Ensembl', 'value': dbr.get('id')} )
+  for el in dbr.iterchildren(T_PROPERTY):
+    ptype = el.get('type')
+    if ptype == 'protein sequence ID' or ptype == 'gene ID':
+      xrefs.append( {'xtype': 'Ensembl', 'value': el.get('value')} )
+
+def dbr_drugbank(dbr, target, xrefs, goas, e2e):
+  xtra = None
+  for el in dbr.iterchildren(T_PROPERTY):
+    if el.get('type') == 'generic name':
+      xtra = el.get('value')
+  xrefs.append( {'xtype': 'DrugBank', 'value': dbr.get('id'), 'xtra': xtra} )
+
+def dbr_xref(dbr, target, xrefs, goas, e2e):
+  xrefs.append( {'xtype': dbr.get('type'), 'value': dbr.get('id')} )
+
+DBREF_HANDLERS = {'GeneID': dbr_geneid, 'GO': dbr_go, 'Ensembl': dbr_ensembl,
+                  'DrugBank': dbr_drugbank, 'STRING': dbr_xref,
+                  'InterPro': dbr_domain, 'Pfam': dbr_domain,
+                  'PROSITE': dbr_domain, 'SMART': dbr_domain,
+                  'BRENDA': dbr_xref, 'ChEMBL': dbr_xref, 'MIM': dbr_xref,
+                  'PANTHER': dbr_xref, 'PDB': dbr_xref, 'RefSeq': dbr_xref,
+                  'UniGene': dbr_xref}
   
 
 if __name__ == '__main__':
@@ -246,6 +552,8 @@ if __name__ == '__main__':
   args = docopt(__doc__, version=__version__)
   if args['--debug']:
     print(f"\n[*DEBUG*] ARGS:\nargs\n")
+  if args['--profile'] and args['--profile'] not in profiling.MODES:
+    sys.exit(f"ERROR: --profile must be one of: {', '.join(profiling.MODES)}")
   if args['--logfile']:
     logfile =  args['--logfile']
   else:
@@ -255,7 +563,7 @@ if __name__ == '__main__':
   logger.setLevel(loglevel)
   if not args['--debug']:
     logger.propagate = False # turns off console logging
-  fh = logging.FileHandler(LOGFILE)
+  fh = logging.FileHandler(logfile)
   fmtr = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
   fh.setFormatter(fmtr)
   logger.addHandler(fh)
@@ -267,14 +575,19 @@ if __name__ == '__main__':
   if not args['--quiet']:
     print("Connected to TDLBase: {} (schema ver {}; data ver {})".format(args['--dbname'], dbi['schema_ver'], dbi['data_ver']))
 
-  download_eco(args)
-  download_uniprot(args)
+  prof = profiling.Profiler(args['--profile'], f"{LOGDIR}/{PROGRAM}")
+
+  with prof.phase('download'):
+    download(args, logger)
 
   # UniProt uses ECO IDs in GOAs, not GO evidence codes, so get a mapping of
   # ECO IDs to GO evidence codes
-  eco_map = mk_eco_map(args)
+  with prof.phase('ECO map'):
+    eco_map = mk_eco_map(args)
   
-  load_targets(args, dba, eco_map, logger, logfile)
+  with prof.phase('load (parse + insert)'):
+    load_targets(args, dba, eco_map, logger, logfile)
+  prof.report()
   
   elapsed = time.time() - start_time
   print("\n{}: Done. Elapsed time: {}\n".format(PROGRAM, slmf.secs2str(elapsed)))
@@ -15,17 +15,24 @@ Usage example::
     >>> for stanza in parser:
     >>>     eco[stanza.tags["id"][0]] = stanza.tags
 
+FastParser is a drop-in replacement for Parser that produces the same
+Stanza and Value objects, but reads the file in large blocks and avoids
+per-character and per-value work (tokenize and eval) in the common cases.
+Use it for large ontologies like GO.
+
 """
 __author__    = "Steve Mathias"
 __email__     = "smathias @salud.unm.edu"
 __org__       = "Translational Informatics Division, UNM School of Medicine"
 __copyright__ = "Copyright 2015-2024, Steve Mathias"
 __license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
-__version__   = "0.9.1"
-__all__ = ["ParseError", "Stanza", "Parser", "Value"]
+__version__   = "0.10.1"
+__all__ = ["ParseError", "Stanza", "Parser", "FastParser", "Value"]
 
 from io import StringIO
+import ast
 import re
+import sys
 import tokenize
 
 class ParseError(Exception):
@@ -238,6 +245,8 @@ class Parser(object):
         stanza.tags[tag].append(value)
       except KeyError:
         stanza.tags[tag] = [value]
+    if stanza:
+      yield stanza
 
   def __iter__(self):
     return self.stanzas()
@@ -245,10 +254,133 @@ class Parser(object):
   def __del(self):
     self.file_handle.close()
 
+class FastParser(Parser):
+  """An OBO parser class for large files.
+
+  This produces exactly the same headers and stanzas as Parser:
+
+    >>> import obo
+    >>> parser = obo.FastParser("go.obo")
+
+  The differences are all in how the file is read and lines are parsed:
+    - the file is read in BLOCK_SIZE blocks and split into lines with
+      string operations
+    - '!' comments are found with str.index, or a regular expression
+      that skips quoted strings, instead of a character by character scan
+    - tag names are interned
+    - quoted values are unescaped without tokenize and eval (escapes
+      other than \\, \", \', \n, \t and \r fall back to
+      ast.literal_eval, so the values are those Python would produce)
+  """
+
+  BLOCK_SIZE = 1024 * 1024
+  # the longest prefix of a line with no '!' outside of quoted strings
+  _unquoted_re = re.compile(r'(?:[^"!]+|"(?:[^"\\]|\\.)*")*')
+  _escape_re = re.compile(r'\\(.)')
+  _complex_escape_re = re.compile(r'\\[xuUN0-7abfv]')
+  _escapes = {'\\': '\\', '"': '"', "'": "'", 'n': '\n', 't': '\t', 'r': '\r'}
+
+  def __init__(self, infile):
+    # The block reader is shared by _read_headers() and stanzas(), so that
+    # the rest of the block read for the headers is not lost
+    self._raw = None
+    Parser.__init__(self, infile)
+
+  def _raw_lines(self):
+    """Iterates over the lines of the file, read in large blocks"""
+    rest = ''
+    while True:
+      block = self.file_handle.read(self.BLOCK_SIZE)
+      if not block:
+        break
+      lines = (rest + block).split('\n')
+      rest = lines.pop()
+      yield from lines
+    if rest:
+      yield rest
+
+  def _lines(self):
+    """Iterates over the lines of the file, removing
+    comments and trailing newlines and merging multi-line
+    tag-value pairs into a single line"""
+    if self._raw is None:
+      self._raw = self._raw_lines()
+    raw = self._raw
+    for line in raw:
+      self.lineno += 1
+      line = line.strip()
+      if not line:
+        yield line
+        continue
+      if line[0] == '!':
+        continue
+      if line[-1] == '\\':
+        # This line is continued in the next line(s)
+        lines = [line[:-1]]
+        for line in raw:
+          self.lineno += 1
+          if line[0] == '!':
+            continue
+          line = line.strip()
+          if line[-1] != '\\':
+            lines.append(line)
+            break
+          lines.append(line[:-1])
+        line = " ".join(lines)
+      elif '!' in line:
+        if '"' not in line:
+          line = line[0:line.index('!')].strip()
+        else:
+          # skip over the quoted strings, and cut at a '!' after them
+          end = self._unquoted_re.match(line).end()
+          if end < len(line) and line[end] == '!':
+            line = line[0:end].strip()
+      yield line
+
+  def _parse_line(self, line):
+    """Parses a single line consisting of a tag-value pair
+    and optional modifiers. Returns the tag name and the
+    value as a Value object."""
+    i = line.find(':')
+    if i < 1:
+      return False
+    tag = sys.intern(line[:i])
+    value_and_mod = line[i+1:].lstrip()
+    if value_and_mod and value_and_mod[0] == '"':
+      # find the closing quote, skipping escaped characters
+      end = 1
+      while True:
+        end = value_and_mod.find('"', end)
+        if end == -1:
+          raise ParseError("cannot parse string literal", self.lineno)
+        bs = end - 1
+        while value_and_mod[bs] == '\\':
+          bs -= 1
+        if (end - 1 - bs) % 2 == 0:
+          break
+        end += 1
+      value = value_and_mod[1:end]
+      if '\\' in value:
+        value = self._unescape(value_and_mod[0:end+1])
+      mod = (value_and_mod[end+1:].strip(), )
+    else:
+      value = value_and_mod
+      mod = None
+    return tag, Value(value, mod)
+
+  def _unescape(self, literal):
+    """Returns the value of a quoted string literal, as eval() would"""
+    if self._complex_escape_re.search(literal):
+      return ast.literal_eval(literal)
+    return self._escape_re.sub(self._replace_escape, literal[1:-1])
+
+  def _replace_escape(self, m):
+    return self._escapes.get(m.group(1), m.group(0))
+
 def test():
   for f in ['/home/app/TCRD/data/eco.obo', '/home/app/TCRD/data/DiseaseOntology/doid.obo']:
     print(f"\nParsing file {f}")
-    parser = Parser(f)
+    parser = FastParser(f)
     ct = 0
     for _ in parser:
       ct += 1
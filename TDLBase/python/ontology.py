@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+A compact is_a graph of the terms in an OBO format ontology.
+
+Terms are numbered in file order and the is_a parents of each term are
+stored in CSR (compressed sparse row) form in two integer arrays:
+parent_idx[parent_ptr[i]:parent_ptr[i+1]] are the indexes of the parents
+of term i. The ancestor closure of a term is computed on first use and
+memoized as a bitset (a Python int with bit j set for each ancestor j).
+
+This works for the evidenceontology eco.obo, Disease Ontology doid.obo
+and Gene Ontology go.obo files.
+
+Usage example::
+
+    >>> import ontology
+    >>> eco = ontology.Ontology("eco.obo")
+    >>> eco.is_a("ECO:0007001", "ECO:0000269")
+    True
+    >>> eco_map = eco.nearest_mapped(direct_map)
+
+Parsing a large OBO file takes seconds, so load() keeps pickled Ontology
+objects in a cache directory, keyed by the SHA-256 digest of the OBO file
+and the versions of this module and obo.py. The cache is shared by all
+tools that use load()::
+
+    >>> eco = ontology.load("eco.obo")
+
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+__all__ = ["Ontology", "load", "cache_key"]
+
+import os
+import pickle
+from array import array
+from collections import deque
+import obo
+import slm_util_functions as slmf
+
+CACHE_DIR = '../data/cache/ontology/'
+
+class Ontology(object):
+  """An ontology read from an OBO file, with an integer-indexed is_a DAG.
+
+  This class has these member variables:
+    'headers' is the dict of OBO file headers
+    'ids' is the list of term IDs, in file order
+    'index' is a dict of term ID: index into ids
+    'terms' is the list of the tags dicts of the [Term] stanzas
+    'parent_ptr' and 'parent_idx' are the CSR arrays of is_a parents
+
+  is_a values naming terms that are not in the file are ignored.
+  """
+
+  def __init__(self, fn, parser_class=obo.FastParser):
+    parser = parser_class(fn)
+    self.headers = parser.headers
+    self.ids = []
+    self.index = {}
+    self.terms = []
+    for stanza in parser:
+      if stanza.name != 'Term':
+        continue
+      tid = stanza.tags['id'][0].value
+      self.index[tid] = len(self.ids)
+      self.ids.append(tid)
+      self.terms.append(stanza.tags)
+    self.parent_ptr = array('l', [0])
+    self.parent_idx = array('l')
+    for tags in self.terms:
+      for v in tags.get('is_a', []):
+        p = self.index.get(v.value)
+        if p is not None:
+          self.parent_idx.append(p)
+      self.parent_ptr.append(len(self.parent_idx))
+    self._order = None
+    self._anc = {}
+
+  def __len__(self):
+    return len(self.ids)
+
+  def __contains__(self, tid):
+    return tid in self.index
+
+  def __getitem__(self, tid):
+    """Returns the tags dict of term tid"""
+    return self.terms[self.index[tid]]
+
+  def name(self, tid):
+    tags = self[tid]
+    return tags['name'][0].value if 'name' in tags else None
+
+  def parents(self, tid):
+    """Returns the list of is_a parent IDs of term tid"""
+    i = self.index[tid]
+    return [ self.ids[p] for p in self.parent_idx[self.parent_ptr[i]:self.parent_ptr[i+1]] ]
+
+  def topological_order(self):
+    """
+    Returns the list of term indexes ordered so that every term comes
+    after all of its ancestors. Raises ValueError if the is_a graph has
+    a cycle.
+    """
+    if self._order is None:
+      n = len(self.ids)
+      ptr, idx = self.parent_ptr, self.parent_idx
+      nparents = array('l', (ptr[i+1] - ptr[i] for i in range(n)))
+      # CSR arrays of children, to visit each term after its last parent
+      child_ptr = array('l', [0]) * (n + 1)
+      for p in idx:
+        child_ptr[p+1] += 1
+      for i in range(n):
+        child_ptr[i+1] += child_ptr[i]
+      child_idx = array('l', [0]) * len(idx)
+      fill = array('l', child_ptr)
+      for i in range(n):
+        for p in idx[ptr[i]:ptr[i+1]]:
+          child_idx[fill[p]] = i
+          fill[p] += 1
+      queue = deque(i for i in range(n) if nparents[i] == 0)
+      order = []
+      while queue:
+        i = queue.popleft()
+        order.append(i)
+        for c in child_idx[child_ptr[i]:child_ptr[i+1]]:
+          nparents[c] -= 1
+          if nparents[c] == 0:
+            queue.append(c)
+      if len(order) != n:
+        raise ValueError("is_a graph has a cycle")
+      self._order = order
+    return self._order
+
+  def ancestor_mask(self, i):
+    """
+    Returns the bitset of the strict ancestors of the term with index i.
+    Bitsets are memoized, so repeated queries are O(1).
+    """
+    anc = self._anc
+    if i in anc:
+      return anc[i]
+    # check that the graph is acyclic, so the traversal terminates
+    self.topological_order()
+    ptr, idx = self.parent_ptr, self.parent_idx
+    # iterative post-order traversal, so deep ontologies do not hit the
+    # recursion limit
+    stack = [i]
+    while stack:
+      j = stack[-1]
+      pending = [ p for p in idx[ptr[j]:ptr[j+1]] if p not in anc ]
+      if pending:
+        stack.extend(pending)
+        continue
+      stack.pop()
+      if j not in anc:
+        mask = 0
+        for p in idx[ptr[j]:ptr[j+1]]:
+          mask |= anc[p] | (1 << p)
+        anc[j] = mask
+    return anc[i]
+
+  def ancestors(self, tid):
+    """Returns the set of IDs of the strict ancestors of term tid"""
+    return set(self._mask2ids(self.ancestor_mask(self.index[tid])))
+
+  def is_a(self, tid, ancestor):
+    """Returns True if term ancestor is a strict ancestor of term tid"""
+    return bool(self.ancestor_mask(self.index[tid]) >> self.index[ancestor] & 1)
+
+  def ancestors_of(self, tids):
+    """
+    Returns the set of IDs of the strict ancestors of any of the terms in
+    tids. This walks the graph once instead of building the closure of
+    each term, so it is suitable for one-off queries on large sets of terms.
+    """
+    ptr, idx = self.parent_ptr, self.parent_idx
+    seen = set()
+    stack = []
+    for tid in tids:
+      i = self.index[tid]
+      stack.extend(idx[ptr[i]:ptr[i+1]])
+    while stack:
+      i = stack.pop()
+      if i in seen:
+        continue
+      seen.add(i)
+      stack.extend(idx[ptr[i]:ptr[i+1]])
+    return { self.ids[i] for i in seen }
+
+  def leaves(self, tids):
+    """
+    Returns the subset of the terms in tids that are not an ancestor of
+    another term in tids, ie. the most specific terms. This uses the
+    memoized ancestor bitsets, so is fast for many queries on overlapping
+    sets of terms (eg. the GO annotations of each target).
+    """
+    idxs = { self.index[tid] for tid in tids }
+    mask = 0
+    for i in idxs:
+      mask |= self.ancestor_mask(i)
+    return { self.ids[i] for i in idxs if not mask >> i & 1 }
+
+  def nearest_mapped(self, mapping):
+    """
+    Given a dict of term ID: value for some terms, returns a dict of term
+    ID: value for every term that has a mapped term among itself and its
+    ancestors, using the value of the nearest one (fewest is_a steps). Ties
+    are broken in favour of the mapped term that comes first in the file.
+    """
+    n = len(self.ids)
+    ptr, idx = self.parent_ptr, self.parent_idx
+    # nearest[i] is the index of the nearest mapped term of term i, or -1
+    dist = array('l', [-1]) * n
+    nearest = array('l', [-1]) * n
+    for i in self.topological_order():
+      if self.ids[i] in mapping:
+        dist[i] = 0
+        nearest[i] = i
+        continue
+      for p in idx[ptr[i]:ptr[i+1]]:
+        if nearest[p] == -1:
+          continue
+        d = dist[p] + 1
+        if nearest[i] == -1 or d < dist[i] or (d == dist[i] and nearest[p] < nearest[i]):
+          dist[i] = d
+          nearest[i] = nearest[p]
+    return { self.ids[i]: mapping[self.ids[nearest[i]]] for i in range(n) if nearest[i] != -1 }
+
+  def _mask2ids(self, mask):
+    while mask:
+      low = mask & -mask
+      yield self.ids[low.bit_length() - 1]
+      mask ^= low
+
+def cache_key(fn):
+  """
+  Return a key for cached data derived from OBO file fn: the file's base
+  name, the start of its SHA-256 digest and the versions of obo.py and this
+  module. Programs that cache their own data built from an ontology (eg.
+  load-UniProt.py's ECO map) can use this in their cache file names.
+  """
+  name = os.path.splitext(os.path.basename(fn))[0]
+  return f"{name}_{slmf.sha256sum(fn)[:16]}_obo{obo.__version__}_ont{__version__}"
+
+def load(fn, cache_dir=CACHE_DIR):
+  """
+  Return the Ontology for OBO file fn, from the cache in cache_dir if it
+  has been built from the current file, or else parse it and cache it.
+  Cached Ontologies for older versions of the file are removed.
+  """
+  key = cache_key(fn)
+  # one subdirectory per ontology, holding the cache for the current file
+  cdir = os.path.join(cache_dir, os.path.splitext(os.path.basename(fn))[0])
+  cfn = os.path.join(cdir, key + '.pickle')
+  if os.path.exists(cfn):
+    with open(cfn, 'rb') as ifh:
+      return pickle.load(ifh)
+  ont = Ontology(fn)
+  # store the topological order with the ontology, as it is needed by
+  # most queries
+  ont.topological_order()
+  os.makedirs(cdir, exist_ok=True)
+  for old in os.listdir(cdir):
+    os.remove(os.path.join(cdir, old))
+  tmpfn = cfn + '.tmp'
+  with open(tmpfn, 'wb') as ofh:
+    pickle.dump(ont, ofh, protocol=pickle.HIGHEST_PROTOCOL)
+  os.replace(tmpfn, cfn)
+  return ont
+
+def test():
+  for f in ['/home/app/TCRD/data/eco.obo', '/home/app/TCRD/data/DiseaseOntology/doid.obo']:
+    print(f"\nReading ontology file {f}")
+    ont = Ontology(f)
+    print(f"  {len(ont)} terms; {len(ont.parent_idx)} is_a relationships")
+    leaves = ont.leaves(ont.ids)
+    print(f"  {len(leaves)} leaf terms")
+
+
+if __name__ == "__main__":
+  test()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Phase timing and CPU profiling for the ETL scripts' --profile option.
+
+A Profiler times the named phases of a run and, while it is running,
+profiles the CPU with either:
+  - cprofile: the deterministic cProfile profiler. Stats are written to
+    <prefix>.pstats, for pstats, snakeviz, etc. Only the main thread is
+    profiled.
+  - sampling: a statistical profiler that samples the stacks of all threads
+    every interval seconds, from a background thread. Stacks are written to
+    <prefix>.folded in the folded format of flamegraph.pl and speedscope,
+    with the thread name as the root frame. Its overhead is low and does not
+    depend on the number of function calls, so it distorts less.
+Worker processes (eg. load-UniProt.py --procs) are not profiled.
+
+Usage example::
+
+    >>> import profiling
+    >>> prof = profiling.Profiler(args['--profile'], LOGDIR + PROGRAM)
+    >>> with prof.phase('download'):
+    ...   download(args, logger)
+    >>> with prof.phase('load'):
+    ...   for rec in profiling.timed(parse(fn), 'parse'):
+    ...     with profiling.phase('insert'):
+    ...       insert(rec)
+    >>> prof.report()
+
+Functions called by the script, that have no Profiler to hand, can time
+phases of the active Profiler with the module's phase() and timed().
+timed() adds the time spent getting items from an iterable to a phase, for
+phases that are interleaved with others, like parsing entries while loading
+them. If there is no active Profiler, or it was created with mode None,
+phases are not timed and report() prints nothing, so scripts can use all of
+these unconditionally. Phases can nest or run concurrently (eg. parsing in a
+background thread), so their times need not add up to the total.
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+__all__ = ["Profiler", "SamplingProfiler", "phase", "timed", "MODES"]
+
+import os
+import sys
+import threading
+import cProfile
+import pstats
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter, sleep
+
+MODES = ['cprofile', 'sampling']
+# The active Profiler, used by timed()
+_active = None
+
+class SamplingProfiler(object):
+  """
+  Samples the Python stacks of all threads (except its own) every interval
+  seconds, and counts each distinct stack.
+  """
+
+  def __init__(self, interval=0.005):
+    self.interval = interval
+    self.counts = Counter()
+    self._stop = threading.Event()
+    self._thread = None
+
+  def start(self):
+    self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop.set()
+    self._thread.join()
+
+  def _run(self):
+    own = threading.get_ident()
+    while not self._stop.is_set():
+      names = { t.ident: t.name for t in threading.enumerate() }
+      for tid,frame in sys._current_frames().items():
+        if tid == own:
+          continue
+        stack = []
+        while frame is not None:
+          co = frame.f_code
+          stack.append(f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})")
+          frame = frame.f_back
+        stack.append(names.get(tid, str(tid)))
+        self.counts[';'.join(reversed(stack))] += 1
+      sleep(self.interval)
+
+  def write_folded(self, fn):
+    """Write the counted stacks to file fn in folded format"""
+    with open(fn, 'w') as ofh:
+      for stack,ct in self.counts.most_common():
+        ofh.write(f"{stack} {ct}\n")
+
+  def hotspots(self, n=20):
+    """
+    Returns a list of the n (function, own samples, total samples) with
+    the most own samples, ie. thread samples in which they were the
+    innermost frame. Idle threads (waiting in a lock or queue) count too.
+    """
+    own = Counter()
+    total = Counter()
+    for stack,ct in self.counts.items():
+      frames = stack.split(';')[1:]
+      own[frames[-1]] += ct
+      for f in set(frames):
+        total[f] += ct
+    return [ (f, ct, total[f]) for f,ct in own.most_common(n) ]
+
+class Profiler(object):
+  """
+  Times named phases and profiles the CPU, as described in the module
+  docstring. mode is 'cprofile', 'sampling' or None (no profiling or phase
+  timing). Output files are named prefix plus '.pstats' or '.folded'.
+  """
+
+  def __init__(self, mode, prefix, interval=0.005):
+    global _active
+    if mode is not None and mode not in MODES:
+      raise ValueError(f"Unknown profiler mode {mode}: must be one of {', '.join(MODES)}")
+    self.mode = mode
+    self.prefix = prefix
+    self.phases = {}
+    self._start = perf_counter()
+    if mode == 'cprofile':
+      self._prof = cProfile.Profile()
+      self._prof.enable()
+    elif mode == 'sampling':
+      self._prof = SamplingProfiler(interval)
+      self._prof.start()
+    _active = self
+
+  @contextmanager
+  def phase(self, name):
+    """Context manager that adds the wall time of its body to phase name"""
+    if self.mode:
+      # phases are reported in the order they start
+      self.phases.setdefault(name, 0.0)
+    t0 = perf_counter()
+    try:
+      yield
+    finally:
+      self.add_time(name, perf_counter() - t0)
+
+  def add_time(self, name, t):
+    if self.mode:
+      self.phases[name] = self.phases.get(name, 0.0) + t
+
+  def stop(self):
+    """Stop profiling and write the output file. Returns its name."""
+    global _active
+    if _active is self:
+      _active = None
+    if self.mode == 'cprofile':
+      self._prof.disable()
+      fn = self.prefix + '.pstats'
+      self._prof.dump_stats(fn)
+    else:
+      self._prof.stop()
+      fn = self.prefix + '.folded'
+      self._prof.write_folded(fn)
+    return fn
+
+  def report(self, n=20, stream=sys.stdout):
+    """
+    Stop profiling, write the output file, and print the phase wall times
+    and the top n hotspots.
+    """
+    if not self.mode:
+      return
+    elapsed = perf_counter() - self._start
+    fn = self.stop()
+    print(f"\nProfile ({self.mode}):", file=stream)
+    print("  Phase wall times:", file=stream)
+    for name,t in self.phases.items():
+      print(f"    {name:24} {t:10.3f}s {100*t/elapsed:6.1f}%", file=stream)
+    print(f"    {'total':24} {elapsed:10.3f}s", file=stream)
+    print(f"  Top {n} functions by own time:", file=stream)
+    if self.mode == 'cprofile':
+      st = pstats.Stats(fn, stream=stream)
+      st.sort_stats('tottime').print_stats(n)
+    else:
+      samples = sum(self._prof.counts.values()) or 1
+      print(f"    {'own %':>7} {'total %':>7}  function (of {samples} thread samples)", file=stream)
+      for f,own,total in self._prof.hotspots(n):
+        print(f"    {100*own/samples:7.1f} {100*total/samples:7.1f}  {f}", file=stream)
+    print(f"  Profile written to {fn}", file=stream)
+
+@contextmanager
+def phase(name):
+  """Context manager that adds the wall time of its body to phase name of the active Profiler"""
+  prof = _active
+  if prof is None or not prof.mode:
+    yield
+    return
+  with prof.phase(name):
+    yield
+
+def timed(iterable, name):
+  """
+  Yields the items of iterable, adding the time spent getting each one to
+  phase name of the active Profiler.
+  """
+  prof = _active
+  if prof is None or not prof.mode:
+    yield from iterable
+    return
+  it = iter(iterable)
+  while True:
+    t0 = perf_counter()
+    try:
+      item = next(it)
+    except StopIteration:
+      prof.add_time(name, perf_counter() - t0)
+      return
+    prof.add_time(name, perf_counter() - t0)
+    yield item
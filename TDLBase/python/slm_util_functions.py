@@ -1,6 +1,13 @@
-import os,sys,platform,time,re,gzip
+import os,sys,platform,time,re,gzip,hashlib,csv,io,mmap
+import threading,queue
+from array import array
 from functools import reduce
 from itertools import islice
+from operator import itemgetter
+try:
+  import numpy as np
+except ImportError:
+  np = None
 
 def get_pw(f):
   with open(f, 'r') as ifh:
@@ -12,6 +19,64 @@ def chunker(lst, n):
   for i in range(0, len(lst), n):
     yield lst[i:i + n]
 
+def prefetch(iterable, maxsize=1000, batch_size=100, stats=None):
+  """
+  Iterate over iterable in a background thread and yield its items in lists
+  of up to batch_size items. At most maxsize items are buffered, so the
+  producer blocks (is idle) when the consumer falls behind.
+  If a stats dict is given, it is updated with the busy and idle times, in
+  seconds, of the producer and the consumer: 'producer_busy',
+  'producer_idle', 'consumer_busy' and 'consumer_idle'.
+  """
+  if stats is None:
+    stats = {}
+  for k in ['producer_busy', 'producer_idle', 'consumer_busy', 'consumer_idle']:
+    stats[k] = 0.0
+  q = queue.Queue(maxsize)
+  done = object()
+  def produce():
+    try:
+      it = iter(iterable)
+      while True:
+        t0 = time.perf_counter()
+        try:
+          item = next(it)
+        except StopIteration:
+          break
+        t1 = time.perf_counter()
+        q.put(item)
+        stats['producer_busy'] += t1 - t0
+        stats['producer_idle'] += time.perf_counter() - t1
+    except BaseException as e:
+      q.put( (done, e) )
+      return
+    q.put( (done, None) )
+  thread = threading.Thread(target=produce, daemon=True)
+  thread.start()
+  finished = False
+  while not finished:
+    t0 = time.perf_counter()
+    batch = []
+    item = q.get()
+    stats['consumer_idle'] += time.perf_counter() - t0
+    while True:
+      if type(item) is tuple and len(item) == 2 and item[0] is done:
+        if item[1] is not None:
+          raise item[1]
+        finished = True
+        break
+      batch.append(item)
+      if len(batch) == batch_size:
+        break
+      try:
+        item = q.get_nowait()
+      except queue.Empty:
+        break
+    if batch:
+      t0 = time.perf_counter()
+      yield batch
+      stats['consumer_busy'] += time.perf_counter() - t0
+
 def secs2str(t):
   return "%d:%02d:%02d.%03d" % reduce(lambda ll,b : divmod(ll[0],b) + ll[1:], [(t*1000,),1000,60,60])
 
@@ -27,6 +92,14 @@ def gzwcl(fname):
       pass
   return i + 1
 
+def sha256sum(fname, blocksize=1024*1024):
+  """Return the SHA-256 hex digest of the contents of a file."""
+  sha = hashlib.sha256()
+  with open(fname, 'rb') as f:
+    for block in iter(lambda: f.read(blocksize), b''):
+      sha.update(block)
+  return sha.hexdigest()
+
 def update_progress(progress):
   '''
   Displays/Updates a progress bar in a console.
@@ -52,31 +125,276 @@ def update_progress(progress):
   sys.stdout.write(pbar)
   sys.stdout.flush()
 
+class ProgressMeter(object):
+  """
+  A throttled console progress meter, showing percent done, rows/sec, MB/sec
+  and ETA:
+
+    >>> with open(fn) as ifh:
+    >>>   pm = ProgressMeter(fh=ifh, quiet=args['--quiet'])
+    >>>   for line in ifh:
+    >>>     pm.update()
+    >>>   pm.close()
+
+  Progress through a file is measured in bytes read from its file handle
+  fh (which may be returned by open_stream()), which is the compressed size
+  for compressed files, so no pre-count of lines is needed. Alternatively, position is a function
+  returning the number of bytes consumed so far, and total the number of
+  bytes, or, without fh or position, total is the number of rows.
+  The meter is redrawn at most once every interval seconds, and does nothing
+  if quiet is True or stream is not a terminal.
+  """
+
+  def __init__(self, fh=None, position=None, total=None, initial=0, quiet=False, interval=0.5, stream=sys.stdout):
+    self.rows = initial
+    self._initial = initial
+    self._interval = interval
+    self._stream = stream
+    self._enabled = not quiet and stream.isatty()
+    self._position = position
+    self._total = total
+    if fh is not None:
+      ras = get_read_ahead_stream(fh)
+      if ras:
+        self._position = lambda: ras.bytes_consumed
+        if total is None:
+          self._total = ras.size
+      else:
+        fd = fh.fileno()
+        self._position = lambda: os.lseek(fd, 0, os.SEEK_CUR)
+        if total is None:
+          self._total = os.fstat(fd).st_size
+    self._start = time.monotonic()
+    self._start_pos = self._position() if self._position else 0
+    self._last = 0
+
+  def update(self, n=1):
+    """Add n rows, and redraw if interval seconds have passed since the last redraw"""
+    self.rows += n
+    if self._enabled:
+      now = time.monotonic()
+      if now - self._last >= self._interval:
+        self._last = now
+        self._draw(now)
+
+  def close(self):
+    """Draw the meter for the final count, and end the line"""
+    if self._enabled:
+      self._draw(time.monotonic(), done=True)
+      self._stream.write("\n")
+      self._stream.flush()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def _draw(self, now, done=False):
+    elapsed = max(now - self._start, 1e-9)
+    rows = self.rows - self._initial
+    msg = f"{self.rows:,} rows, {rows/elapsed:,.0f} rows/s"
+    if self._position:
+      pos = self._position()
+      msg += f", {(pos - self._start_pos)/elapsed/1e6:.1f} MB/s"
+      frac = pos / self._total if self._total else None
+      rate = (pos - self._start_pos) / elapsed
+      remaining = (self._total - pos) / rate if self._total and rate > 0 else None
+    else:
+      frac = self.rows / self._total if self._total else None
+      rate = rows / elapsed
+      remaining = (self._total - self.rows) / rate if self._total and rate > 0 else None
+    if done:
+      frac = 1.0 if self._total else frac
+      remaining = 0
+    if frac is not None:
+      frac = min(frac, 1.0)
+      prog = int(round(30 * frac))
+      bar = "Progress: [{}] {:5.1f}% ".format("#"*prog + "-"*(30-prog), frac*100)
+    else:
+      bar = "Progress: "
+    eta = " Done." if done else (f" ETA {int(remaining)//3600:d}:{int(remaining)%3600//60:02d}:{int(remaining)%60:02d}" if remaining is not None else "")
+    self._stream.write(f"\r{bar}{msg}{eta}\033[K")
+    self._stream.flush()
+
+# Magic bytes of compressed file formats
+MAGIC = [(b'\x1f\x8b', 'gzip'),
+         (b'BZh', 'bz2'),
+         (b'\xfd7zXZ\x00', 'xz'),
+         (b'\x28\xb5\x2f\xfd', 'zstd')]
+
+class _CountingReader(io.RawIOBase):
+  """Counts the bytes read from a binary file object"""
+
+  def __init__(self, fh):
+    self._fh = fh
+    self.bytes_read = 0
+
+  def readable(self):
+    return True
+
+  def readinto(self, b):
+    n = self._fh.readinto(b)
+    self.bytes_read += n or 0
+    return n
+
+  def close(self):
+    self._fh.close()
+    super().close()
+
+class ReadAheadStream(io.RawIOBase):
+  """
+  A binary stream that reads (and decompresses) blocks of a file in a
+  background thread, up to max_blocks blocks ahead of the reader. See
+  open_stream().
+  This class has two member variables for progress reporting:
+    'bytes_consumed' is the number of bytes of the underlying (compressed)
+    file that have been consumed by the reader
+    'size' is the size of the underlying file, or None if it is not known
+  """
+
+  def __init__(self, reader, counter, size=None, block_size=1024*1024, max_blocks=16, readahead=True):
+    self._reader = reader
+    self._counter = counter
+    self._block_size = block_size
+    self._buf = memoryview(b'')
+    self._eof = False
+    self.bytes_consumed = 0
+    self.size = size
+    self._thread = None
+    if readahead:
+      self._queue = queue.Queue(max_blocks)
+      self._stop = threading.Event()
+      self._thread = threading.Thread(target=self._fill, daemon=True)
+      self._thread.start()
+
+  def readable(self):
+    return True
+
+  def readinto(self, b):
+    if not self._buf:
+      if self._eof:
+        return 0
+      if self._thread:
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+          self._eof = True
+          raise item
+        block, self.bytes_consumed = item
+      else:
+        block = self._reader.read(self._block_size)
+        self.bytes_consumed = self._counter.bytes_read
+      if not block:
+        self._eof = True
+        return 0
+      self._buf = memoryview(block)
+    n = min(len(b), len(self._buf))
+    b[:n] = self._buf[:n]
+    self._buf = self._buf[n:]
+    return n
+
+  def close(self):
+    if not self.closed:
+      if self._thread:
+        self._stop.set()
+        self._thread.join()
+      self._reader.close()
+      self._counter.close()
+    super().close()
+
+  def _fill(self):
+    try:
+      while True:
+        block = self._reader.read(self._block_size)
+        if not self._put( (block, self._counter.bytes_read) ) or not block:
+          return
+    except BaseException as e:
+      self._put(e)
+
+  def _put(self, item):
+    while not self._stop.is_set():
+      try:
+        self._queue.put(item, timeout=0.1)
+        return True
+      except queue.Full:
+        pass
+    return False
+
+def open_stream(fname, mode='rb', encoding='utf-8', newline=None, readahead=True, block_size=1024*1024, max_blocks=16, use_mmap=False):
+  """
+  Open a local file, URL (http://, https:// or ftp://) or '-' (standard
+  input) for reading. gzip, bz2, xz and zstd (if the zstandard module is
+  installed) files are recognized by their magic bytes and decompressed.
+  By default, reading and decompression is done in a background thread,
+  up to max_blocks blocks of block_size bytes ahead, so that it overlaps
+  with the caller's processing of the data.
+  Returns a binary (mode 'rb') or text (mode 'r' or 'rt') file object,
+  which can be given to ProgressMeter to report progress in bytes of the
+  (compressed) file. With use_mmap=True, an uncompressed local regular file
+  opened in mode 'rb' is returned as a read-only mmap.mmap object instead.
+  (Other sources are returned as streams, as usual.)
+  """
+  if mode not in ('r', 'rt', 'rb'):
+    raise ValueError(f"Invalid mode for open_stream(): {mode}")
+  size = None
+  # only local regular files can be mmapped
+  regular = False
+  if fname == '-':
+    raw = sys.stdin.buffer
+  elif fname.startswith("http://") or fname.startswith("https://") or fname.startswith("ftp://"):
+    from urllib.request import urlopen
+    raw = urlopen(fname)
+    if raw.headers.get('Content-Length'):
+      size = int(raw.headers['Content-Length'])
+  else:
+    raw = open(fname, 'rb')
+    size = os.fstat(raw.fileno()).st_size
+    regular = os.path.isfile(fname)
+  counter = _CountingReader(raw)
+  reader = io.BufferedReader(counter, block_size)
+  magic = reader.peek(6)[:6]
+  fmt = next((f for m,f in MAGIC if magic.startswith(m)), None)
+  if fmt == 'gzip':
+    reader = gzip.GzipFile(fileobj=reader)
+  elif fmt == 'bz2':
+    import bz2
+    reader = bz2.BZ2File(reader)
+  elif fmt == 'xz':
+    import lzma
+    reader = lzma.LZMAFile(reader)
+  elif fmt == 'zstd':
+    import zstandard
+    reader = zstandard.ZstdDecompressor().stream_reader(reader)
+  elif use_mmap and mode == 'rb' and regular and size:
+    mm = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+    raw.close()
+    return mm
+  stream = io.BufferedReader(ReadAheadStream(reader, counter, size, block_size, max_blocks, readahead), block_size)
+  if mode == 'rb':
+    return stream
+  return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+def get_read_ahead_stream(fh):
+  """
+  Return the ReadAheadStream underlying a file object returned by
+  open_stream(), or None if there is none.
+  """
+  while fh is not None:
+    if isinstance(fh, ReadAheadStream):
+      return fh
+    fh = getattr(fh, 'buffer', None) or getattr(fh, 'raw', None)
+  return None
+
 def open_anything(fname, *args, **kwds):
   """Opens the given file. The file may be given as a file object
-  or a filename. If the filename ends in ``.bz2`` or ``.gz``, it will
-  automatically be decompressed on the fly. If the filename starts
-  with ``http://``, ``https://`` or ``ftp://`` and there is no
-  other argument given, the remote URL will be opened for reading.
-  A single dash in place of the filename means the standard input.
+  or a filename. Compressed files are decompressed on the fly, URLs
+  starting with ``http://``, ``https://`` or ``ftp://`` are opened for
+  reading, and a single dash in place of the filename means the standard
+  input. See open_stream(), which this calls with any other arguments.
   """
-  #if isinstance(fname, file):
-  if os.path.isfile(fname):
-    infile = fname
-  elif fname == "-":
-    infile = sys.stdin
-  elif (fname.startswith("http://") or fname.startswith("ftp://") or fname.startswith("https://")) and not kwds and not args:
-    import urllib2
-    infile = urllib2.urlopen(fname)
-  elif fname[-4:] == ".bz2":
-    import bz2
-    infile = bz2.BZ2File(fname, *args, **kwds)
-  elif fname[-3:] == ".gz":
-    import gzip
-    infile = gzip.GzipFile(fname, *args, **kwds)
-  else:
-    infile = open(fname, *args, **kwds)
-  return infile
+  if hasattr(fname, 'read'):
+    return fname
+  return open_stream(fname, *args, **kwds)
 
 def tsv2csv(tsv):
   """
@@ -109,3 +427,77 @@ def file2list(fn, delim = ','):
 def split_line(line, delim):
   return line.strip().split(delim)
 
+# Suffix of the names of read_columns()' null masks for int columns
+NULL_MASK_SUFFIX = ':null'
+
+def read_columns(fn, columns=None, types=None, chunk_size=100000, delim=None, names=None, use_numpy=False):
+  """
+  Read a delimited text file in chunks of up to chunk_size rows, and yield
+  each chunk as a dict of column name: column values.
+
+    >>> for chunk in read_columns('idmapping.tsv.gz', columns=['UniProtKB-AC', 'GeneID'], types={'GeneID': int}):
+    >>>   for up,geneid in zip(chunk['UniProtKB-AC'], chunk['GeneID']):
+
+  The file may be compressed (see open_stream()), and is parsed with the
+  csv module, so quoted fields are handled. delim defaults to tab, or comma
+  for .csv files.
+  Column names are read from the first line, unless names is given (in
+  which case the file has no header line). Only the columns in columns
+  (default all) are returned.
+  types is a dict of column name: int, float or str (the default). int
+  and float columns are returned as arrays ('q' and 'd'), and str columns
+  as lists. Empty values are None in str columns and NaN in float columns.
+  In int columns they are 0, and each int column has a null mask, under
+  its name plus NULL_MASK_SUFFIX, that is 1 (True) where the value was
+  empty:
+
+    >>> for chunk in read_columns(fn, columns=['UniProtKB-AC', 'GeneID'], types={'GeneID': int}):
+    >>>   for up,geneid,null in zip(chunk['UniProtKB-AC'], chunk['GeneID'], chunk['GeneID' + NULL_MASK_SUFFIX]):
+
+  If use_numpy is True, all columns are returned as NumPy arrays (int
+  columns as int64, so large IDs are exact, and null masks as bool). A
+  column is the same type in every chunk, whether or not the chunk has
+  empty values.
+  """
+  if use_numpy and np is None:
+    raise ImportError("read_columns(use_numpy=True) requires numpy")
+  if delim is None:
+    delim = ',' if fn.replace('.gz', '').endswith('.csv') else '\t'
+  types = types or {}
+  with open_stream(fn, 'rt', newline='') as ifh:
+    reader = csv.reader(ifh, delimiter=delim)
+    if names is None:
+      names = next(reader)
+    if columns is None:
+      columns = names
+    idxs = [names.index(c) for c in columns]
+    getter = itemgetter(*idxs) if len(idxs) > 1 else lambda row: (row[idxs[0]],)
+    ncols = max(idxs) + 1
+    while True:
+      rows = list(islice(reader, chunk_size))
+      if not rows:
+        break
+      # short rows (eg. with trailing empty fields removed) are padded
+      projected = [ getter(row if len(row) >= ncols else row + [''] * (ncols - len(row))) for row in rows ]
+      chunk = {}
+      for name,values in zip(columns, zip(*projected)):
+        typ = types.get(name, str)
+        chunk[name] = _coerce_column(values, typ, use_numpy)
+        if typ is int:
+          mask = array('b', (v == '' for v in values))
+          chunk[name + NULL_MASK_SUFFIX] = np.frombuffer(mask, dtype=np.bool_) if use_numpy else mask
+      yield chunk
+
+def _coerce_column(values, typ, use_numpy):
+  if typ is str:
+    col = [ v if v != '' else None for v in values ]
+    return np.array(col, dtype=object) if use_numpy else col
+  if typ is float:
+    col = array('d', (float(v) if v != '' else float('nan') for v in values))
+    return np.frombuffer(col, dtype=np.float64) if use_numpy else col
+  if typ is int:
+    # empty values are 0, and marked in the column's null mask
+    col = array('q', (int(v) if v != '' else 0 for v in values))
+    return np.frombuffer(col, dtype=np.int64) if use_numpy else col
+  col = [ typ(v) if v != '' else None for v in values ]
+  return np.array(col, dtype=object) if use_numpy else col
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Byte offset based access to UniProt XML files.
+
+UniProt XML files are a single <uniprot> root element containing one
+<entry> element per UniProt record. This module locates the <entry>
+elements by byte offset, without building a tree for the whole file,
+so that entries can be parsed in independent slices (eg. by a pool of
+worker processes).
+
+Usage example::
+
+    >>> import uniprot_xml
+    >>> fn = "uniprot_sprot_human.xml"
+    >>> spans = uniprot_xml.scan_entries(fn)
+    >>> root_tag = uniprot_xml.get_root_tag(fn)
+    >>> for offset, length, ct in uniprot_xml.partition(spans, 8):
+    >>>     for entry in uniprot_xml.parse_slice(fn, offset, length, root_tag):
+    >>>         print(entry.accession)
+
+For random access by accession, a persistent SQLite index of the byte
+offsets of all entries can be built (once per file) and used like this::
+
+    >>> idx = uniprot_xml.EntryIndex(fn)
+    >>> entry = idx.get_entry("P08908")
+
+Note that this only works on uncompressed files.
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+__all__ = ["scan_entries", "get_root_tag", "partition", "parse_slice", "EntryIndex"]
+
+import os
+import mmap
+import re
+import sqlite3
+from lxml import objectify
+
+ENTRY_START_RE = re.compile(rb'<entry[\s>]')
+ENTRY_END = b'</entry>'
+ROOT_START = b'<uniprot'
+ROOT_END = b'</uniprot>'
+ACCESSION_RE = re.compile(rb'<accession>([^<]+)</accession>')
+INDEX_SUFFIX = '.idx'
+
+def scan_entries(fn):
+  """
+  Return a list of (offset, length) tuples, one for each <entry> element in
+  the UniProt XML file fn, in file order.
+  """
+  spans = []
+  with open(fn, 'rb') as fh:
+    with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+      pos = 0
+      while True:
+        m = ENTRY_START_RE.search(mm, pos)
+        if not m:
+          break
+        start = m.start()
+        end = mm.find(ENTRY_END, start)
+        if end == -1:
+          raise ValueError(f"Unterminated <entry> element at byte {start} in {fn}")
+        pos = end + len(ENTRY_END)
+        spans.append( (start, pos - start) )
+  return spans
+
+def get_root_tag(fn):
+  """
+  Return the start tag of the <uniprot> root element of the UniProt XML file
+  fn as bytes. Wrapping slices of <entry> elements in this tag keeps the
+  namespace declarations intact.
+  """
+  with open(fn, 'rb') as fh:
+    with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+      start = mm.find(ROOT_START)
+      if start == -1:
+        raise ValueError(f"No <uniprot> root element in {fn}")
+      end = mm.find(b'>', start)
+      return mm[start:end+1]
+
+def partition(spans, n):
+  """
+  Split the entry spans returned by scan_entries() into at most n contiguous
+  slices of roughly equal size in bytes. Returns a list of (offset, length,
+  entry count) tuples in file order.
+  """
+  if not spans:
+    return []
+  total = sum(l for _,l in spans)
+  target = max(1, total // max(1, n))
+  slices = []
+  first = 0
+  size = 0
+  for i,(offset,length) in enumerate(spans):
+    size += length
+    if size >= target or i == len(spans) - 1:
+      start = spans[first][0]
+      slices.append( (start, offset + length - start, i - first + 1) )
+      first = i + 1
+      size = 0
+  return slices
+
+def parse_slice(fn, offset, length, root_tag):
+  """
+  Parse length bytes of the UniProt XML file fn starting at offset, which
+  must contain only complete <entry> elements (see scan_entries() and
+  partition()), and return the list of lxml.objectify entry elements.
+  """
+  with open(fn, 'rb') as fh:
+    fh.seek(offset)
+    data = fh.read(length)
+  root = objectify.fromstring(root_tag + data + ROOT_END)
+  return list(root.iterchildren())
+
+class EntryIndex(object):
+  """
+  A persistent index of the byte offsets of the <entry> elements in an
+  uncompressed UniProt XML file, keyed by all primary and secondary
+  accessions. The index is stored in an SQLite file next to the XML file
+  (or in idxfn) and is (re)built when it is missing or was built from a
+  file of a different size or modification time, ie. once per UniProt
+  release.
+  """
+
+  def __init__(self, fn, idxfn=None, rebuild=False):
+    self.fn = fn
+    self.idxfn = idxfn if idxfn else fn + INDEX_SUFFIX
+    self._fh = open(fn, 'rb')
+    self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+    self._conn = sqlite3.connect(self.idxfn)
+    if rebuild or not self._is_current():
+      self._build()
+    self._root_tag = get_root_tag(fn)
+
+  def __contains__(self, acc):
+    return len(self.lookup(acc)) > 0
+
+  def __len__(self):
+    """Returns the number of indexed entries"""
+    return self._conn.execute("SELECT COUNT(*) FROM entry WHERE is_primary = 1").fetchone()[0]
+
+  def lookup(self, acc):
+    """
+    Return a list of the (offset, length) tuples of the entries with
+    accession acc. The entry for which acc is the primary accession, if
+    any, is first. There can be more than one entry for a secondary
+    accession (eg. after an entry has been demerged).
+    """
+    sql = "SELECT offset, length FROM entry WHERE acc = ? ORDER BY is_primary DESC, offset"
+    return [ (row[0], row[1]) for row in self._conn.execute(sql, (acc,)) ]
+
+  def get_entry(self, acc):
+    """
+    Parse and return the entry with accession acc as an
+    lxml.objectify.ObjectifiedElement, or None if there is no such entry.
+    """
+    spans = self.lookup(acc)
+    if not spans:
+      return None
+    offset, length = spans[0]
+    root = objectify.fromstring(self._root_tag + self._mm[offset:offset+length] + ROOT_END)
+    return root.entry
+
+  def close(self):
+    self._conn.close()
+    self._mm.close()
+    self._fh.close()
+
+  def _stat(self):
+    st = os.stat(self.fn)
+    return (st.st_size, st.st_mtime)
+
+  def _is_current(self):
+    try:
+      row = self._conn.execute("SELECT size, mtime, version FROM info").fetchone()
+    except sqlite3.Error:
+      return False
+    return row == self._stat() + (__version__,)
+
+  def _build(self):
+    with self._conn:
+      self._conn.execute("DROP TABLE IF EXISTS info")
+      self._conn.execute("DROP TABLE IF EXISTS entry")
+      self._conn.execute("CREATE TABLE info (size INTEGER, mtime REAL, version TEXT)")
+      self._conn.execute("CREATE TABLE entry (acc TEXT, offset INTEGER, length INTEGER, is_primary INTEGER, PRIMARY KEY (acc, offset)) WITHOUT ROWID")
+      self._conn.executemany("INSERT INTO entry VALUES (?, ?, ?, ?)", self._index_rows())
+      self._conn.execute("INSERT INTO info VALUES (?, ?, ?)", self._stat() + (__version__,))
+
+  def _index_rows(self):
+    for offset,length in scan_entries(self.fn):
+      # accessions are the first child elements of an entry
+      end = self._mm.find(b'<name>', offset, offset + length)
+      if end == -1:
+        end = offset + length
+      for i,m in enumerate(ACCESSION_RE.finditer(self._mm[offset:end])):
+        yield (m.group(1).decode(), offset, length, 1 if i == 0 else 0)
@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 """
-DrugCentral ETL Script. Extracts all DrugCentral activities against human targets and writes the data to a CSV file.
+DrugCentral ETL Script. Extracts all DrugCentral activities against human targets and writes the data to a CSV,
+Parquet or Arrow IPC file.
 
 Usage: 
-    DrugCentral-ETL.py [--debug | --quiet] [--host=<str>] [--port=<int>] [--dbname=<str>] [--user=<str>] [--password=<str>] [--outfile=<str>]
+    DrugCentral-ETL.py [--debug | --quiet] [--host=<str>] [--port=<int>] [--dbname=<str>] [--user=<str>] [--password=<str>] [--outfile=<str>] [--fields=<str>] [--itersize=<int>] [--copy] [--partitions=<int>] [--format=<str>] [--batch-size=<int>] [--incremental] [--snapshot-dir=<dir>] [--queue-size=<int>] [--workers=<int>] [--worker-type=<str>] [--profile=<str>]
     DrugCentral-ETL.py [--help | --version]
 
 Options:
@@ -14,7 +15,31 @@ Options:
   --dbname=DBNAME    The name of the database [default: drugcentral]
   --user=DBUSER      The username for authentication [default: drugman]
   --password=DBPASS  The password for authentication [default: dosage]
-  --outfile=OFN      Filename for the output CSV file [default: DrugCentralActivities.csv]
+  --outfile=OFN      Filename for the output file [default: DrugCentralActivities.csv]
+  --format=FMT       Output file format: csv, parquet or arrow (Arrow IPC). parquet and arrow
+                     require pyarrow. [default: csv]
+  --batch-size=N     Number of rows written to the output file at a time [default: 10000]
+  --incremental      Keep all activities in a local Parquet snapshot, and only fetch activities
+                     added since the last run. If the DrugCentral dbversion has not changed and
+                     there are no new activities, the output is written from the snapshot.
+                     Requires pyarrow.
+  --snapshot-dir=DIR  Directory for the --incremental snapshot [default: ../data/cache/DrugCentral/]
+  --fields=FIELDS    Comma-separated list of fields to output, in order. The default is all fields
+                     in CSV_HEADER.
+  --itersize=N       Number of rows fetched from the server per network round trip [default: 10000]
+  --copy             Export with PostgreSQL COPY, which writes the CSV on the server side and
+                     streams it to the output file, instead of running the ETL pipeline
+  --partitions=N     Split the activities into N act_id ranges of about equal size and extract
+                     them concurrently over N connections [default: 1]
+  --queue-size=N     Maximum number of rows waiting between ETL pipeline nodes (bonobo's default
+                     is 8192)
+  --workers=N        Number of workers that run transform in parallel on batches of --batch-size
+                     rows [default: 1]
+  --worker-type=TYPE  Type of transform workers: thread or process [default: process]
+  --profile=MODE     Profile the run with MODE cprofile or sampling, and print phase wall times
+                     and hotspots at exit. The profile is written to ../log/. cprofile only
+                     profiles the main thread, and bonobo runs each pipeline node in a thread
+                     of its own, so use sampling to profile the pipeline.
   --quiet            set output verbosity to minimal level
   --debug            write debugging output to logfile ../log/DrugCentral-ETL.log
 
@@ -24,7 +49,7 @@ __email__     = "smathias @salud.unm.edu"
 __org__       = "Translational Informatics Division, UNM School of Medicine"
 __copyright__ = "Copyright 2025, Steve Mathias"
 __license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
-__version__   = "0.1.1"
+__version__   = "0.8.0"
 
 import os,sys,time
 import platform
@@ -35,18 +60,80 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from icecream import ic
 import csv
+import json
+import functools
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import bonobo_metrics
+# profiling is shared with the TDLBase loaders
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'TDLBase', 'python'))
+import profiling
+try:
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+  import pyarrow.compute as pc
+except ImportError:
+  pa = None
 
 PROGRAM = os.path.basename(sys.argv[0])
 LOGFILE = f"../log/{PROGRAM}.log"
-DC_ACTS_SQL = """SELECT atf.*, s.name, s.smiles 
+DC_ACTS_SQL = """SELECT {columns}
                  FROM act_table_full atf, structures s 
                  WHERE atf.struct_id = s.cd_id AND 
                        atf.organism = 'Homo sapiens'"""
+# max_act_id is selected from the same rows as DC_ACTS_SQL, so that it can be
+# compared with the last act_id fetched
+DC_WATERMARK_SQL = """SELECT (SELECT max(version) FROM dbversion),
+                             (SELECT max(atf.act_id)
+                              FROM act_table_full atf, structures s
+                              WHERE atf.struct_id = s.cd_id AND
+                                    atf.organism = 'Homo sapiens')"""
+DC_ACT_ID_PCTS_SQL = """SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY act_id)
+                        FROM act_table_full
+                        WHERE organism = 'Homo sapiens'"""
 # The header fields define the data that is output to the CSV file
 CSV_HEADER = ['target_name', 'target_class', 'gene', 'uniprot', 'swissprot', 'ligand_name', 'ligand_smiles', 
               'act_type', 'relation', 'act_value', 'action_type', 'act_source', 'act_source_url', 'act_comment', 
               'moa', 'moa_source', 'moa_source_url', 'first_in_class']
-HEADER_FLAG = False
+# The column each output field is selected from. Fields not in CSV_HEADER
+# can be requested with --fields.
+DC_FIELDS = {'act_id': 'atf.act_id',
+             'struct_id': 'atf.struct_id',
+             'target_id': 'atf.target_id',
+             'target_name': 'atf.target_name',
+             'target_class': 'atf.target_class',
+             'gene': 'atf.gene',
+             'uniprot': 'atf.accession',
+             'swissprot': 'atf.swissprot',
+             'ligand_name': 's.name',
+             'ligand_smiles': 's.smiles',
+             'act_type': 'atf.act_type',
+             'relation': 'atf.relation',
+             'act_value': 'atf.act_value',
+             'action_type': 'atf.action_type',
+             'act_source': 'atf.act_source',
+             'act_source_url': 'atf.act_source_url',
+             'act_comment': 'atf.act_comment',
+             'moa': 'atf.moa',
+             'moa_source': 'atf.moa_source',
+             'moa_source_url': 'atf.moa_source_url',
+             'first_in_class': 'atf.first_in_class'}
+# Fields that are not strings. Values are converted to these types in
+# transform(), and they are the column types of Parquet/Arrow output.
+FIELD_TYPES = {'act_id': int,
+               'struct_id': int,
+               'target_id': int,
+               'act_value': float,
+               'moa': int}
+FIELDS = CSV_HEADER
+OUT_FORMAT = 'csv'
+BATCH_SIZE = 10000
+SNAPSHOT_FILE = 'DrugCentralActivities.parquet'
+# How NULLs are written to the CSV spool files of extract_partitioned()
+SPOOL_NULL = r'\N'
+# Key of the snapshot's watermark in its Parquet key/value metadata
+WATERMARK_KEY = b'drugcentral_etl.watermark'
 
 def construct_pg_dsn(
     hostname: str = "localhost",
@@ -84,41 +171,323 @@ def construct_pg_dsn(
   
   return dsn
   
-def extract(dsn: str) -> None:
+def dc_acts_sql(fields: list = CSV_HEADER, act_range: tuple = None) -> str:
+  """
+  Returns DC_ACTS_SQL selecting just the given output fields, renamed in SQL.
+  If act_range is given, only activities with lo <= act_id < hi are selected,
+  in act_id order. Either bound may be None.
+  """
+  columns = ", ".join( f"{DC_FIELDS[f]} AS {f}" for f in fields )
+  sql = DC_ACTS_SQL.format(columns=columns)
+  if act_range:
+    lo, hi = act_range
+    if lo is not None:
+      sql += f" AND atf.act_id >= {int(lo)}"
+    if hi is not None:
+      sql += f" AND atf.act_id < {int(hi)}"
+    sql += " ORDER BY atf.act_id"
+  return sql
+
+def act_id_ranges(dsn: str, n: int) -> list:
+  """
+  Returns a list of up to n (lo, hi) act_id ranges that each hold about the
+  same number of human activities. The bounds are percentiles of act_id,
+  so gaps in the act_id sequence do not unbalance the ranges.
+  """
+  if n < 2:
+    return [(None, None)]
+  conn = psycopg2.connect(dsn)
+  with conn:
+    with conn.cursor() as cursor:
+      cursor.execute(DC_ACT_ID_PCTS_SQL, ([i/n for i in range(1, n)],))
+      pcts = cursor.fetchone()[0] or []
+  conn.close()
+  bounds = [None] + sorted(set(pcts)) + [None]
+  return list(zip(bounds[:-1], bounds[1:]))
+
+def extract(dsn: str, fields: list = CSV_HEADER, itersize: int = 10000, act_range: tuple = None) -> None:
+  """
+  Yields a dict for each DrugCentral activity (in act_range, if given; see
+  dc_acts_sql()), with keys fields.
+  
+  A named (server-side) cursor is used, so rows are fetched from the server
+  itersize at a time as they are consumed, rather than the whole result set
+  being transferred before the first row is yielded.
+  """
   conn = psycopg2.connect(dsn)
   ic(conn)
-  with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-    cursor.execute(DC_ACTS_SQL)
-    for d in cursor:
-      yield d
+  # named cursors only exist within a transaction, which is ended by the
+  # connection context manager
+  with conn:
+    with conn.cursor(name='dc_acts', cursor_factory=RealDictCursor) as cursor:
+      cursor.itersize = itersize
+      cursor.execute(dc_acts_sql(fields, act_range))
+      for d in cursor:
+        yield d
   conn.close()
   
+def extract_partitioned(dsn: str, fields: list, ranges: list, spool_dir: str) -> None:
+  """
+  Yields a dict for each DrugCentral activity, like extract(), but the
+  act_id ranges are COPYed concurrently, one connection each, into CSV spool
+  files in spool_dir. Rows are yielded in range order, each range as soon as
+  it and all ranges before it have been spooled.
+  
+  NULLs are spooled as SPOOL_NULL, so they are told apart from empty
+  strings, and values are converted to their FIELD_TYPES, so rows are the
+  same as extract()'s once transformed. (A string that is SPOOL_NULL itself
+  is read as None.)
+  """
+  with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+    futures = []
+    for i,act_range in enumerate(ranges):
+      spool_fn = os.path.join(spool_dir, f"part{i}.csv")
+      futures.append( (spool_fn, executor.submit(copy_to_file, dsn, spool_fn, fields, act_range, False, SPOOL_NULL)) )
+    for spool_fn,future in futures:
+      future.result()
+      with open(spool_fn, newline='') as ifh:
+        for row in csv.reader(ifh):
+          actd = { f: v if v != SPOOL_NULL else None for f,v in zip(fields, row) }
+          yield dict(zip(fields, typed_values(actd, fields)))
+      os.remove(spool_fn)
+
+def copy_partitioned(dsn: str, fn: str, fields: list, ranges: list) -> int:
+  """
+  Writes the DrugCentral activities to CSV file fn like copy_to_file(), but
+  the act_id ranges are COPYed concurrently, one connection each, into spool
+  files that are then concatenated in range order. Returns the number of
+  rows written.
+  """
+  spool_dir = tempfile.mkdtemp(prefix='dc_acts_', dir=os.path.dirname(os.path.abspath(fn)))
+  try:
+    spool_fns = [ os.path.join(spool_dir, f"part{i}.csv") for i in range(len(ranges)) ]
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+      cts = list(executor.map(copy_to_file, [dsn]*len(ranges), spool_fns, [fields]*len(ranges), ranges, [i == 0 for i in range(len(ranges))]))
+    with open(fn, 'wb') as ofh:
+      for spool_fn in spool_fns:
+        with open(spool_fn, 'rb') as ifh:
+          shutil.copyfileobj(ifh, ofh, 1024*1024)
+  finally:
+    shutil.rmtree(spool_dir)
+  return sum(cts)
+
+def copy_to_file(dsn: str, fn: str, fields: list = CSV_HEADER, act_range: tuple = None, header: bool = True, null: str = None) -> int:
+  """
+  Writes the DrugCentral activities (in act_range, if given) to CSV file fn
+  using COPY TO STDOUT, so that no Python objects are created per row.
+  NULLs are written as null if given, otherwise as empty fields.
+  Returns the number of rows written.
+  """
+  copy_sql = f"COPY ({dc_acts_sql(fields, act_range)}) TO STDOUT WITH CSV"
+  if header:
+    copy_sql += " HEADER"
+  if null is not None:
+    copy_sql += f" NULL '{null}'"
+  conn = psycopg2.connect(dsn)
+  ic(conn)
+  with conn:
+    with conn.cursor() as cursor, open(fn, 'wb') as ofh:
+      cursor.copy_expert(copy_sql, ofh)
+      ct = cursor.rowcount
+  conn.close()
+  return ct
+
+def typed_values(actd: dict, fields: list) -> list:
+  """
+  Returns the list of values of fields in activity dict actd, converted to
+  their FIELD_TYPES (or str). NULLs are None.
+  """
+  row = []
+  for k in fields:
+    v = actd[k]
+    if v is not None:
+      v = FIELD_TYPES.get(k, str)(v)
+    row.append(v)
+  return row
+
 def transform(actd):
-  actd["uniprot"] = actd.pop("accession")
-  actd["ligand_name"] = actd.pop("name")
-  actd["ligand_smiles"] = actd.pop("smiles")
-  for k in ['act_id', 'struct_id', 'target_id', 'act_ref_id', 'moa_ref_id', 'organism', 'tdl']:
-    del actd[k]
   #ic(actd)  
-  csvlst = []
-  for k in CSV_HEADER:
-    if actd[k] != None:
-      csvlst.append( str(actd[k]) )
-    else:
-      csvlst.append('')
-  csvstr = ",".join(csvlst)
+  return typed_values(actd, FIELDS)
+
+class BatchWriter(object):
+  """
+  Base class of the output file writers. Rows are collected and written
+  batch_size at a time by the subclass's write_batch().
+  """
+  
+  def __init__(self, batch_size: int = BATCH_SIZE):
+    self.batch_size = batch_size
+    self._batch = []
+
+  def write(self, row: list):
+    self._batch.append(row)
+    if len(self._batch) >= self.batch_size:
+      self.write_batch(self._batch)
+      self._batch = []
+
+  def write_table(self, table):
+    """Writes the rows of pyarrow Table table"""
+    self.close_batch()
+    cols = [ col.to_pylist() for col in table.columns ]
+    self.write_batch(list(zip(*cols)))
+
+  def close_batch(self):
+    if self._batch:
+      self.write_batch(self._batch)
+      self._batch = []
+
+  def close(self):
+    self.close_batch()
+
+class CSVWriter(BatchWriter):
+  """Writes rows to a CSV file, with a header line of fields."""
+  
+  def __init__(self, fn: str, fields: list, batch_size: int = BATCH_SIZE):
+    super().__init__(batch_size)
+    self._fh = open(fn, 'w', newline='', buffering=1024*1024)
+    self._writer = csv.writer(self._fh, lineterminator='\n')
+    self._writer.writerow(fields)
+
+  def write_batch(self, rows: list):
+    self._writer.writerows(rows)
+
+  def close(self):
+    super().close()
+    self._fh.close()
+
+class ArrowWriter(BatchWriter):
+  """
+  Writes rows to a Parquet or Arrow IPC file, with columns typed as given
+  by FIELD_TYPES. Each batch is written as a Parquet row group or an Arrow
+  record batch. metadata is the schema's key/value metadata.
+  """
+  ARROW_TYPES = {int: 'int64', float: 'float64', str: 'string'}
   
-  return csvstr
+  def __init__(self, fn: str, fields: list, fmt: str = 'parquet', batch_size: int = BATCH_SIZE, metadata: dict = None):
+    super().__init__(batch_size)
+    self.schema = pa.schema([ (f, self.ARROW_TYPES[FIELD_TYPES.get(f, str)]) for f in fields ], metadata=metadata)
+    if fmt == 'parquet':
+      self._writer = pq.ParquetWriter(fn, self.schema)
+    else:
+      self._writer = pa.ipc.new_file(fn, self.schema)
+
+  def write_batch(self, rows: list):
+    cols = zip(*rows)
+    arrays = [ pa.array(col, type=field.type) for col,field in zip(cols, self.schema) ]
+    self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+  def write_table(self, table):
+    self.close_batch()
+    self._writer.write_table(table.cast(self.schema))
+
+  def close(self):
+    super().close()
+    self._writer.close()
+
+def open_writer(fn: str, fields: list, fmt: str = 'csv', batch_size: int = BATCH_SIZE) -> BatchWriter:
+  if fmt == 'csv':
+    return CSVWriter(fn, fields, batch_size)
+  return ArrowWriter(fn, fields, fmt, batch_size)
+
+def with_writer(self, context):
+  writer = open_writer(OUT_FN, FIELDS, OUT_FORMAT, BATCH_SIZE)
+  try:
+    yield writer
+  finally:
+    writer.close()
+
+@use_context_processor(with_writer)
+def write_to_file(writer, row):
+  writer.write(row)
+
+def remote_watermark(dsn: str) -> dict:
+  """
+  Returns the watermark of the DrugCentral database: its dbversion and its
+  maximum human activity act_id.
+  """
+  conn = psycopg2.connect(dsn)
+  with conn:
+    with conn.cursor() as cursor:
+      cursor.execute(DC_WATERMARK_SQL)
+      (dbversion, max_act_id) = cursor.fetchone()
+  conn.close()
+  return {'dbversion': dbversion, 'max_act_id': max_act_id, 'etl_version': __version__}
+
+def snapshot_watermark(snapshot_fn: str) -> dict:
+  """
+  Returns the watermark of the Parquet snapshot in file snapshot_fn, or None
+  if there is no snapshot (or it has no watermark). Its dbversion and
+  etl_version are kept in the file's key/value metadata, and its max_act_id
+  is that of the activities in it, so the watermark always describes the
+  snapshot's contents.
+  """
+  if not os.path.exists(snapshot_fn):
+    return None
+  metadata = pq.read_schema(snapshot_fn).metadata or {}
+  if WATERMARK_KEY not in metadata:
+    return None
+  watermark = json.loads(metadata[WATERMARK_KEY])
+  act_ids = pq.read_table(snapshot_fn, columns=['act_id']).column('act_id')
+  watermark['max_act_id'] = pc.max(act_ids).as_py()
+  return watermark
+
+def update_snapshot(dsn: str, snapshot_dir: str, itersize: int = 10000) -> int:
+  """
+  Brings the Parquet snapshot of all activities (with all DC_FIELDS) in
+  snapshot_dir up to date with DrugCentral and returns the number of
+  activities fetched.
   
-def load(csvstr):
-  global HEADER_FLAG
-  if HEADER_FLAG == False:
-    header = ",".join(CSV_HEADER)
-    print(header)
-    print(csvstr)
-    HEADER_FLAG = True
+  The snapshot's watermark (see snapshot_watermark()) is written in the
+  same file, which replaces the old snapshot atomically. If the snapshot
+  has the current dbversion, only activities with act_id greater
+  than its max_act_id are fetched and appended to it (if there are none,
+  nothing is fetched). Otherwise all activities are fetched, because
+  act_table_full has no modification times from which changed activities
+  could be identified.
+  """
+  snapshot_fn = os.path.join(snapshot_dir, SNAPSHOT_FILE)
+  fields = list(DC_FIELDS)
+  remote = remote_watermark(dsn)
+  ic(remote)
+  local = snapshot_watermark(snapshot_fn)
+  ic(local)
+  if local == remote:
+    return 0
+  if local and local['dbversion'] == remote['dbversion'] and local['etl_version'] == remote['etl_version'] \
+     and local['max_act_id'] is not None and remote['max_act_id'] is not None \
+     and remote['max_act_id'] > local['max_act_id']:
+    act_range = (local['max_act_id'] + 1, None)
   else:
-    print(csvstr)
+    local = None
+    act_range = (None, None)
+  os.makedirs(snapshot_dir, exist_ok=True)
+  tmp_fn = snapshot_fn + '.tmp'
+  metadata = {WATERMARK_KEY: json.dumps({'dbversion': remote['dbversion'], 'etl_version': remote['etl_version']})}
+  writer = ArrowWriter(tmp_fn, fields, 'parquet', BATCH_SIZE, metadata)
+  if local:
+    for batch in pq.ParquetFile(snapshot_fn).iter_batches(batch_size=BATCH_SIZE):
+      writer.write_table(pa.Table.from_batches([batch]))
+  ct = 0
+  for actd in extract(dsn, fields, itersize, act_range):
+    writer.write(typed_values(actd, fields))
+    ct += 1
+  writer.close()
+  os.replace(tmp_fn, snapshot_fn)
+  return ct
+
+def export_snapshot(snapshot_dir: str, fn: str, fields: list, fmt: str = 'csv') -> int:
+  """
+  Writes fields of the activities in the snapshot in snapshot_dir to file fn
+  in format fmt. Returns the number of activities written.
+  """
+  ct = 0
+  writer = open_writer(fn, fields, fmt, BATCH_SIZE)
+  pf = pq.ParquetFile(os.path.join(snapshot_dir, SNAPSHOT_FILE))
+  for batch in pf.iter_batches(batch_size=BATCH_SIZE, columns=fields):
+    writer.write_table(pa.Table.from_batches([batch]))
+    ct += batch.num_rows
+  writer.close()
+  return ct
 
 def with_opened_file(self, context):
   global OUT_FN  
@@ -129,17 +498,6 @@ def with_opened_file(self, context):
 def write_repr_to_file(fh, *row):
   fh.write(repr(row) + "\n")  
   
-@use_context_processor(with_opened_file)
-def write_csv_to_file(fh, csvstr):
-  global HEADER_FLAG
-  if HEADER_FLAG == False:
-    header = ",".join(CSV_HEADER)
-    fh.write(f"{header}\n")
-    fh.write(f"{csvstr}\n")
-    HEADER_FLAG = True
-  else:
-    fh.write(f"{csvstr}\n")
-
 def log_to_file(msg: str):
   with open(LOGFILE, "a") as lfh:
     lfh.write(msg + "\n")
@@ -153,6 +511,30 @@ if __name__ == "__main__":
     ic.configureOutput(prefix="DEBUG| ", outputFunction=log_to_file)
     ic(args)
   OUT_FN = args['--outfile']
+  OUT_FORMAT = args['--format']
+  BATCH_SIZE = int(args['--batch-size'])
+  if OUT_FORMAT not in ['csv', 'parquet', 'arrow']:
+    print(f"ERROR: Unknown output format {OUT_FORMAT}")
+    sys.exit(1)
+  if OUT_FORMAT != 'csv':
+    if pa is None:
+      print(f"ERROR: {OUT_FORMAT} output requires pyarrow")
+      sys.exit(1)
+    if args['--copy']:
+      print(f"ERROR: --copy only writes CSV")
+      sys.exit(1)
+  if args['--incremental'] and pa is None:
+    print(f"ERROR: --incremental requires pyarrow")
+    sys.exit(1)
+  if args['--fields']:
+    FIELDS = args['--fields'].split(',')
+    for f in FIELDS:
+      if f not in DC_FIELDS:
+        print(f"ERROR: Unknown field {f}. Available fields are: {', '.join(DC_FIELDS)}")
+        sys.exit(1)
+  if args['--profile'] and args['--profile'] not in profiling.MODES:
+    print(f"ERROR: --profile must be one of: {', '.join(profiling.MODES)}")
+    sys.exit(1)
 
   print("\n{} (v{}) [{}]:\n".format(PROGRAM, __version__, time.strftime("%c")))
 
@@ -162,18 +544,59 @@ if __name__ == "__main__":
                              user =  args['--user'],
                              password = args['--password'] )
   ic(dc_dsn)
+  prof = profiling.Profiler(args['--profile'], f"../log/{PROGRAM}")
   
-  # Create the ETL pipeline graph
-  graph = bonobo.Graph( extract(dc_dsn),
-                        transform,
-                        #load,
-                        write_csv_to_file 
-                       )
-  ic(graph)
-  # Run the pipeline
-  bonobo.run(graph)
-
-  
-    
-
-
+  partitions = int(args['--partitions'])
+  if args['--incremental']:
+    snapshot_dir = args['--snapshot-dir']
+    with prof.phase('update snapshot'):
+      ct = update_snapshot(dc_dsn, snapshot_dir, int(args['--itersize']))
+    print(f"Fetched {ct} activities into snapshot {os.path.join(snapshot_dir, SNAPSHOT_FILE)}")
+    with prof.phase('export'):
+      ct = export_snapshot(snapshot_dir, OUT_FN, FIELDS, OUT_FORMAT)
+    print(f"Wrote {ct} activities to file {OUT_FN}")
+  elif args['--copy']:
+    if partitions > 1:
+      with prof.phase('partition'):
+        ranges = act_id_ranges(dc_dsn, partitions)
+      ic(ranges)
+      with prof.phase('copy'):
+        ct = copy_partitioned(dc_dsn, OUT_FN, FIELDS, ranges)
+    else:
+      with prof.phase('copy'):
+        ct = copy_to_file(dc_dsn, OUT_FN, FIELDS)
+    print(f"Wrote {ct} activities to file {OUT_FN}")
+  else:
+    if partitions > 1:
+      with prof.phase('partition'):
+        ranges = act_id_ranges(dc_dsn, partitions)
+      ic(ranges)
+      spool_dir = tempfile.mkdtemp(prefix='dc_acts_', dir=os.path.dirname(os.path.abspath(OUT_FN)))
+      source = extract_partitioned(dc_dsn, FIELDS, ranges, spool_dir)
+    else:
+      source = extract(dc_dsn, FIELDS, int(args['--itersize']))
+    metrics = bonobo_metrics.Metrics()
+    source = bonobo_metrics.metered(source, metrics, 'extract')
+    workers = int(args['--workers'])
+    if workers > 1:
+      source = bonobo_metrics.batched(source, BATCH_SIZE)
+      # fields are passed explicitly, as worker processes that are spawned
+      # (rather than forked) import this script afresh, with FIELDS unset
+      xform = bonobo_metrics.parallel_map(functools.partial(typed_values, fields=FIELDS), workers, args['--worker-type'])
+    else:
+      xform = transform
+    queue_size = int(args['--queue-size']) if args['--queue-size'] else None
+    # Create the ETL pipeline graph
+    graph = bonobo.Graph( source,
+                          bonobo_metrics.metered(xform, metrics, 'transform', queue_size),
+                          bonobo_metrics.metered(write_to_file, metrics, 'write', queue_size)
+                         )
+    ic(graph)
+    # Run the pipeline
+    with prof.phase('pipeline'):
+      bonobo.run(graph)
+    if not args['--quiet']:
+      metrics.report()
+    if partitions > 1:
+      shutil.rmtree(spool_dir)
+  prof.report()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Per-node metrics and tuning for bonobo ETL graphs.
+
+metered() wraps a graph node so that, while the graph runs, it records:
+  - rows in: the number of calls of the node (ie. rows read from its input)
+  - rows out: the number of values it returned or yielded
+  - busy time: time spent in the node itself
+  - in wait time: time between calls, ie. waiting for input
+  - out wait time: time between the values a generator node yields, ie.
+    waiting for room in the next node's input queue
+  - queue depth: the length of the node's input queue, sampled at each call
+and can set the size of the node's input queue (bonobo's default is 8192),
+to tune the backpressure between nodes.
+
+A node that is an iterable (eg. a generator object used as the source of a
+graph) has no input queue, so only its rows out, busy and out wait times are
+recorded.
+
+parallel_map() makes a node that maps a function over batches of rows in a
+thread or process pool, to fan out a CPU-bound transform that metering shows
+to be the bottleneck. batched() groups the rows of a source iterable into
+the batches it takes.
+
+Usage example::
+
+    >>> import bonobo
+    >>> import bonobo_metrics as bm
+    >>> metrics = bm.Metrics()
+    >>> graph = bonobo.Graph( bm.metered(extract(), metrics, 'extract'),
+    ...                       bm.metered(transform, metrics, queue_size=1000),
+    ...                       bm.metered(load, metrics) )
+    >>> bonobo.run(graph)
+    >>> metrics.report()
+
+This is written against the bonobo 0.6 API: it relies on context processors
+receiving the node's execution context, whose input queue is context.input.
+"""
+__author__    = "Steve Mathias"
+__email__     = "smathias @salud.unm.edu"
+__org__       = "Translational Informatics Division, UNM School of Medicine"
+__copyright__ = "Copyright 2025, Steve Mathias"
+__license__   = "Creative Commons Attribution-NonCommercial (CC BY-NC)"
+__version__   = "1.0.0"
+__all__ = ["Metrics", "StageMetrics", "metered", "parallel_map", "batched"]
+
+import sys
+import functools
+from itertools import islice
+from time import perf_counter
+from types import GeneratorType
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from bonobo.config import use_context_processor
+
+class StageMetrics(object):
+  """The metrics of one graph node. Times are in seconds."""
+
+  def __init__(self, name):
+    self.name = name
+    self.rows_in = 0
+    self.rows_out = 0
+    self.busy = 0.0
+    self.in_wait = 0.0
+    self.out_wait = 0.0
+    self.depth_sum = 0
+    self.depth_max = 0
+    self.queue_size = None
+    self.input = None
+    self._last = None
+
+  def sample_queue(self):
+    if self.input is not None:
+      depth = self.input.qsize()
+      self.depth_sum += depth
+      if depth > self.depth_max:
+        self.depth_max = depth
+
+  def depth_mean(self):
+    return self.depth_sum / self.rows_in if self.rows_in else 0.0
+
+class Metrics(object):
+  """A collection of StageMetrics, in graph order."""
+
+  def __init__(self):
+    self.stages = []
+
+  def stage(self, name):
+    stage = StageMetrics(name)
+    self.stages.append(stage)
+    return stage
+
+  def report(self, stream=sys.stdout):
+    """Print a table of the metrics of each stage"""
+    cols = ['stage', 'rows in', 'rows out', 'busy s', 'in wait s', 'out wait s', 'rows/busy s', 'queue avg', 'queue max', 'queue size']
+    rows = []
+    for s in self.stages:
+      rate = max(s.rows_in, s.rows_out) / s.busy if s.busy else 0.0
+      rows.append( [s.name, s.rows_in, s.rows_out, f"{s.busy:.2f}", f"{s.in_wait:.2f}", f"{s.out_wait:.2f}",
+                    f"{rate:.0f}", f"{s.depth_mean():.1f}", s.depth_max, s.queue_size or '-'] )
+    widths = [ max(len(str(v)) for v in col) for col in zip(cols, *rows) ]
+    print("\nStage metrics:", file=stream)
+    print("  " + "  ".join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i,(v,w) in enumerate(zip(cols, widths))), file=stream)
+    for row in rows:
+      print("  " + "  ".join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i,(v,w) in enumerate(zip(row, widths))), file=stream)
+
+def metered(node, metrics, name=None, queue_size=None):
+  """
+  Returns node wrapped to record its StageMetrics in metrics (see the
+  module docstring). name defaults to the node's name. If queue_size is
+  given, the node's input queue is limited to that many rows.
+  """
+  if not callable(node):
+    stage = metrics.stage(name or getattr(node, '__name__', type(node).__name__))
+    return _metered_iter(node, stage)
+  stage = metrics.stage(name or getattr(node, '__name__', type(node).__name__))
+  stage.queue_size = queue_size
+
+  @functools.wraps(node)
+  def wrapper(*args):
+    t0 = perf_counter()
+    if stage._last is not None:
+      stage.in_wait += t0 - stage._last
+    stage.rows_in += 1
+    stage.sample_queue()
+    result = node(*args)
+    t1 = perf_counter()
+    stage.busy += t1 - t0
+    if isinstance(result, GeneratorType):
+      return _metered_results(result, stage)
+    if result is not None:
+      stage.rows_out += 1
+    stage._last = t1
+    return result
+
+  # bonobo passes each context processor the values yielded by those before
+  # it, which are not used here
+  def with_stage(self, context, *args):
+    stage.input = getattr(context, 'input', None)
+    if queue_size and stage.input is not None:
+      stage.input.maxsize = queue_size
+    # yields nothing, so the node's arguments are unchanged
+    yield
+
+  # the node's own context processors are run for the wrapper, and the
+  # values they yield are passed through to the node. (A copy, as
+  # functools.wraps shares the node's list.)
+  wrapper.__processors__ = list(getattr(node, '__processors__', []))
+  return use_context_processor(with_stage)(wrapper)
+
+def _metered_results(results, stage):
+  while True:
+    t0 = perf_counter()
+    try:
+      result = next(results)
+    except StopIteration:
+      t1 = perf_counter()
+      stage.busy += t1 - t0
+      stage._last = t1
+      return
+    t1 = perf_counter()
+    stage.busy += t1 - t0
+    stage.rows_out += 1
+    yield result
+    # time until the next value is requested is spent passing this one on
+    stage.out_wait += perf_counter() - t1
+
+def _metered_iter(iterable, stage):
+  it = iter(iterable)
+  while True:
+    t0 = perf_counter()
+    try:
+      row = next(it)
+    except StopIteration:
+      stage.busy += perf_counter() - t0
+      return
+    t1 = perf_counter()
+    stage.busy += t1 - t0
+    stage.rows_out += 1
+    yield row
+    stage.out_wait += perf_counter() - t1
+
+def batched(iterable, size):
+  """Yields lists of up to size consecutive items of iterable"""
+  it = iter(iterable)
+  while True:
+    batch = list(islice(it, size))
+    if not batch:
+      return
+    yield batch
+
+def parallel_map(fn, workers, kind='thread'):
+  """
+  Returns a node that takes a batch (list) of rows and yields fn(row) for
+  each, in order, computed by a pool of workers threads (kind 'thread') or
+  processes (kind 'process'). Threads only help if fn releases the GIL;
+  processes need fn and the rows to be picklable, and fn to be a module
+  level function (or a functools.partial of one). Spawned processes import
+  the main script afresh, so fn must not depend on globals set when it ran.
+  """
+  if kind not in ['thread', 'process']:
+    raise ValueError(f"Unknown worker kind {kind}")
+  def with_executor(self, context):
+    Executor = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+    with Executor(max_workers=workers) as executor:
+      yield executor
+
+  @use_context_processor(with_executor)
+  def node(executor, batch):
+    # a few chunks per process, to keep the pickling overhead down
+    chunksize = max(1, len(batch) // (workers * 4)) if kind == 'process' else 1
+    yield from executor.map(fn, batch, chunksize=chunksize)
+
+  node.__name__ = f"{getattr(fn, '__name__', 'map')}[{workers} {kind}s]"
+  return node
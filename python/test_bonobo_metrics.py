@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Smoke tests of bonobo_metrics against bonobo itself.
+
+Run with: python -m pytest test_bonobo_metrics.py
+"""
+import pytest
+bonobo = pytest.importorskip('bonobo')
+from bonobo.config import use_context_processor
+import bonobo_metrics as bm
+
+# Rows are from 1, as bonobo drops falsy values returned by a node
+
+def double(x):
+  return x * 2
+
+def test_metered_graph():
+  rows = []
+  closed = []
+  def with_sink(self, context):
+    yield rows
+    closed.append(True)
+
+  @use_context_processor(with_sink)
+  def sink(out, x):
+    out.append(x)
+
+  metrics = bm.Metrics()
+  graph = bonobo.Graph( bm.metered(iter(range(1, 101)), metrics, 'extract'),
+                        bm.metered(double, metrics, queue_size=10),
+                        bm.metered(sink, metrics, 'load', queue_size=10) )
+  bonobo.run(graph)
+  # the node's own context processor ran, and with_stage was passed its value
+  assert closed == [True]
+  assert sorted(rows) == [ 2*i for i in range(1, 101) ]
+  extract, transform, load = metrics.stages
+  assert (extract.rows_in, extract.rows_out) == (0, 100)
+  assert (transform.name, transform.rows_in, transform.rows_out) == ('double', 100, 100)
+  assert load.rows_in == 100
+  assert transform.input.maxsize == 10 and load.input.maxsize == 10
+
+def test_parallel_map():
+  rows = []
+  metrics = bm.Metrics()
+  graph = bonobo.Graph( bm.batched(range(1, 101), 7),
+                        bm.metered(bm.parallel_map(double, 2, 'thread'), metrics, 'transform'),
+                        rows.append )
+  bonobo.run(graph)
+  assert rows == [ 2*i for i in range(1, 101) ]
+  assert metrics.stages[0].rows_in == 15
+  assert metrics.stages[0].rows_out == 100